@@ -74,106 +74,115 @@ export function useAIPOGeneration() {
 
         setCurrentSession(response.session_id)
 
-        // Poll status
+        // Long-poll status: each request returns as soon as the session changes
         let lastPct = 0
-        const progressInterval = setInterval(async () => {
-          try {
-            const statusResponse = await apiClient.getAIStatus(response.session_id)
-            console.log('🔄 Status response:', statusResponse)
-
-            // Normalize progress percent from various shapes
-            const raw = (statusResponse as any).progress
-            console.log('📊 Progress raw:', raw)
-            setProgressDetails({
-              current_agent: raw?.current_agent,
-              current_action: raw?.current_action,
-              steps_completed: raw?.steps_completed,
-              steps_remaining: raw?.steps_remaining,
-            })
-            let pctNum: number
-            if (typeof raw === 'object') {
-              const pc = (raw as any)?.percent_complete
-              if (pc !== undefined && pc !== null) {
-                pctNum = Number(pc)
+        const pollStatus = async () => {
+          let since: string | undefined
+          while (true) {
+            try {
+              const statusResponse = await apiClient.getAIStatus(response.session_id, since)
+              since = statusResponse.updated_at
+              console.log('🔄 Status response:', statusResponse)
+
+              // Normalize progress percent from various shapes
+              const raw = (statusResponse as any).progress
+              console.log('📊 Progress raw:', raw)
+              setProgressDetails({
+                current_agent: raw?.current_agent,
+                current_action: raw?.current_action,
+                steps_completed: raw?.steps_completed,
+                steps_remaining: raw?.steps_remaining,
+              })
+              let pctNum: number
+              if (typeof raw === 'object') {
+                const pc = (raw as any)?.percent_complete
+                if (pc !== undefined && pc !== null) {
+                  pctNum = Number(pc)
+                } else {
+                  const completed = Array.isArray((raw as any).steps_completed)
+                    ? (raw as any).steps_completed.length
+                    : 0
+                  const total = completed + (Array.isArray((raw as any).steps_remaining) ? (raw as any).steps_remaining.length : 0)
+                  pctNum = total > 0 ? Math.round((completed / total) * 100) : 0
+                }
               } else {
-                const completed = Array.isArray((raw as any).steps_completed)
-                  ? (raw as any).steps_completed.length
-                  : 0
-                const total = completed + (Array.isArray((raw as any).steps_remaining) ? (raw as any).steps_remaining.length : 0)
-                pctNum = total > 0 ? Math.round((completed / total) * 100) : 0
+                pctNum = Number(raw)
+              }
+              pctNum = Number.isFinite(pctNum) ? pctNum : 0
+              console.log('📈 Progress calculated:', pctNum)
+
+              // Tween progress a bit for smoother movement
+              const nextTarget = Math.min(100, Math.max(lastPct, Math.round(pctNum)))
+              if (nextTarget > lastPct) {
+                const step = Math.max(1, Math.round((nextTarget - lastPct) / 3))
+                let current = lastPct
+                const tween = setInterval(() => {
+                  current = Math.min(nextTarget, current + step)
+                  setProgress(current)
+                  if (current >= nextTarget) {
+                    clearInterval(tween)
+                  }
+                }, 150)
+                lastPct = nextTarget
               }
-            } else {
-              pctNum = Number(raw)
-            }
-            pctNum = Number.isFinite(pctNum) ? pctNum : 0
-            console.log('📈 Progress calculated:', pctNum)
-
-            // Tween progress a bit for smoother movement
-            const nextTarget = Math.min(100, Math.max(lastPct, Math.round(pctNum)))
-            if (nextTarget > lastPct) {
-              const step = Math.max(1, Math.round((nextTarget - lastPct) / 3))
-              let current = lastPct
-              const tween = setInterval(() => {
-                current = Math.min(nextTarget, current + step)
-                setProgress(current)
-                if (current >= nextTarget) {
-                  clearInterval(tween)
-                }
-              }, 150)
-              lastPct = nextTarget
-            }
 
-            const isDone =
-              (statusResponse as any).status === 'completed' ||
-              (statusResponse as any).has_result === true
-            if (isDone) {
-              setStatus('completed')
-              // Ensure progress looks finished while fetching final data
-              setProgress(prev => (prev < 99 ? 99 : prev))
-              const final = await apiClient.getAIResult(response.session_id)
-              // Normalize result to AIPOGenerationResult shape expected by UI
-              const normalized = ((): AIPOGenerationResult => {
-                const items =
-                  (final as any).po_items?.map((it: any) => ({
-                    medication_id: it.med_id,
-                    medication_name: it.med_name,
-                    suggested_quantity: it.quantity,
-                    reason: `${it.supplier_name} • lead ${it.lead_time}d`,
-                    priority: 'medium' as const,
-                  })) || []
-                const computedTotal =
-                  (final as any).po_items?.reduce(
-                    (sum: number, it: any) => sum + (Number(it.subtotal) || 0),
-                    0
-                  ) || 0
-                return {
-                  session_id: (final as any).session_id || response.session_id,
-                  estimated_total: (final as any).metadata?.total_cost ?? computedTotal,
-                  supplier_suggestion:
-                    (final as any).po_items?.[0]?.supplier_name || 'Top Supplier',
-                  reasoning: Object.values((final as any).reasoning || {})
-                    .map((r: any) => r.summary)
-                    .join(' \n '),
-                  items,
-                } as AIPOGenerationResult
-              })()
-              setResult(normalized)
-              setProgress(100)
-              clearInterval(progressInterval)
-              toast.success('AI Purchase Order generated successfully!')
-              queryClient.invalidateQueries({ queryKey: ['inventory'] })
-            } else if ((statusResponse as any).status === 'failed') {
+              const isDone =
+                (statusResponse as any).status === 'completed' ||
+                (statusResponse as any).has_result === true
+              if (isDone) {
+                setStatus('completed')
+                // Ensure progress looks finished while fetching final data
+                setProgress(prev => (prev < 99 ? 99 : prev))
+                const final = await apiClient.getAIResult(response.session_id)
+                // Normalize result to AIPOGenerationResult shape expected by UI
+                const normalized = ((): AIPOGenerationResult => {
+                  const items =
+                    (final as any).po_items?.map((it: any) => ({
+                      medication_id: it.med_id,
+                      medication_name: it.med_name,
+                      suggested_quantity: it.quantity,
+                      reason: `${it.supplier_name} • lead ${it.lead_time}d`,
+                      priority: 'medium' as const,
+                    })) || []
+                  const computedTotal =
+                    (final as any).po_items?.reduce(
+                      (sum: number, it: any) => sum + (Number(it.subtotal) || 0),
+                      0
+                    ) || 0
+                  return {
+                    session_id: (final as any).session_id || response.session_id,
+                    estimated_total: (final as any).metadata?.total_cost ?? computedTotal,
+                    supplier_suggestion:
+                      (final as any).po_items?.[0]?.supplier_name || 'Top Supplier',
+                    reasoning: Object.values((final as any).reasoning || {})
+                      .map((r: any) => r.summary)
+                      .join(' \n '),
+                    items,
+                  } as AIPOGenerationResult
+                })()
+                setResult(normalized)
+                setProgress(100)
+                toast.success('AI Purchase Order generated successfully!')
+                queryClient.invalidateQueries({ queryKey: ['inventory'] })
+                return
+              } else if ((statusResponse as any).status === 'failed') {
+                setStatus('error')
+                toast.error('AI PO generation failed')
+                throw new Error('AI PO generation failed')
+              }
+
+              // Without a version to wait on the server answers at once; back off
+              if (!since) {
+                await new Promise(resolve => setTimeout(resolve, 2000))
+              }
+            } catch (error) {
               setStatus('error')
-              clearInterval(progressInterval)
-              toast.error('AI PO generation failed')
-              throw new Error('AI PO generation failed')
+              console.error('AI PO status polling stopped:', error)
+              return
             }
-          } catch (error) {
-            clearInterval(progressInterval)
-            setStatus('error')
-            throw error
           }
-        }, 800)
+        }
+        void pollStatus()
 
         return response
       } catch (error) {
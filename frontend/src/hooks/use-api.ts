@@ -9,6 +9,7 @@ import type {
   PurchaseOrderCreate,
   LineItem,
   AIGenerationRequest,
+  AIGenerationSession,
 } from '@/types/api'
 
 // Query Keys
@@ -143,7 +144,7 @@ export function useSendPOEmails() {
   return useMutation({
     mutationFn: (request: CreatePOBackendRequest) => apiClient.sendPOEmails(request),
     onSuccess: result => {
-      toast.success(`Sent emails to ${result.sent} suppliers`)
+      toast.success(`Queued emails to ${result.queued} suppliers`)
     },
     onError: (error: Error) => {
       toast.error(`Failed to send emails: ${error.message}`)
@@ -165,13 +166,23 @@ export function useGenerateAIPO() {
 }
 
 export function useAIStatus(sessionId: string, enabled = false) {
+  const queryClient = useQueryClient()
+  const queryKey = queryKeys.aiStatus(sessionId)
   return useQuery({
-    queryKey: queryKeys.aiStatus(sessionId),
-    queryFn: () => apiClient.getAIStatus(sessionId),
+    queryKey,
+    // Send the last seen version so the server holds the request until it changes
+    queryFn: () =>
+      apiClient.getAIStatus(
+        sessionId,
+        queryClient.getQueryData<AIGenerationSession>(queryKey)?.updated_at
+      ),
     enabled: !!sessionId && enabled,
-    refetchInterval: data => {
+    refetchInterval: query => {
+      const data = query.state.data
       // Stop polling when completed or failed
-      return data?.status === 'processing' || data?.status === 'pending' ? 2000 : false
+      if (data?.status !== 'processing' && data?.status !== 'pending') return false
+      // Each long-poll waits server-side, so re-issue it as soon as it returns
+      return data.updated_at ? 1 : 2000
     },
     staleTime: 0, // Always fresh
   })
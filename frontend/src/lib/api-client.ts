@@ -266,7 +266,7 @@ class ApiClient {
     })
   }
 
-  async sendPOEmails(request: CreatePOBackendRequest): Promise<{ sent: number }> {
+  async sendPOEmails(request: CreatePOBackendRequest): Promise<{ queued: number }> {
     return this.request('/purchase-orders/send-emails', {
       method: 'POST',
       body: JSON.stringify(request),
@@ -281,8 +281,22 @@ class ApiClient {
     })
   }
 
-  async getAIStatus(sessionId: string): Promise<AIGenerationSession> {
-    return this.request<AIGenerationSession>(`/purchase-orders/ai-status/${sessionId}`)
+  // With `since`, the server holds the request until the status changes or
+  // `timeout` seconds pass, so callers can loop without a fixed poll interval
+  async getAIStatus(
+    sessionId: string,
+    since?: string,
+    timeout: number = 25
+  ): Promise<AIGenerationSession> {
+    const params = new URLSearchParams()
+    if (since) {
+      params.append('since', since)
+      params.append('timeout', String(timeout))
+    }
+    const query = params.toString()
+    return this.request<AIGenerationSession>(
+      `/purchase-orders/ai-status/${sessionId}${query ? `?${query}` : ''}`
+    )
   }
 
   async getAIResult(sessionId: string): Promise<AIGenerationResult> {
@@ -97,6 +97,7 @@ export interface AIGenerationSession {
   progress: number
   message?: string
   created_at: string
+  updated_at?: string
   completed_at?: string
 }
 
@@ -1,5 +1,6 @@
 """API handler for AI PO generation"""
 
+import asyncio
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -22,6 +23,10 @@ class AIPoHandler:
         # Store for tracking active generations
         self.active_sessions = {}
 
+        # Wakes long-poll status requests when a session changes
+        self._session_events: Dict[str, asyncio.Event] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
         # Ensure data is loaded if not already
         if not self.data_loader.medications:
             logger.debug("Medications not loaded, attempting to load data")
@@ -119,15 +124,16 @@ class AIPoHandler:
             )
 
             # Get consumption history
-            history = self.data_loader.get_medication_consumption_history(
-                med_id, days=90
-            )
-            if not history.get("error"):
-                consumption_history[med_id] = history
+            try:
+                consumption_history[med_id] = (
+                    self.data_loader.get_medication_consumption_history(
+                        med_id, days=90
+                    )
+                )
                 logger.debug(f"Loaded consumption history for medication {med_id}")
-            else:
+            except Exception as e:
                 logger.warning(
-                    f"Failed to load consumption history for {med_id}: {history.get('error')}"
+                    f"Failed to load consumption history for {med_id}: {str(e)}"
                 )
 
         if not medications:
@@ -172,6 +178,7 @@ class AIPoHandler:
                 )[: len(self.active_sessions) - 100]
                 for session_id, _ in oldest_sessions:
                     del self.active_sessions[session_id]
+                    self._session_events.pop(session_id, None)
 
             return result
 
@@ -212,6 +219,9 @@ class AIPoHandler:
             "medication_ids": medication_ids,
         }
 
+        # Background updates run in a worker thread and notify through this loop
+        self._loop = asyncio.get_running_loop()
+
         background_tasks.add_task(
             self._background_generate, temp_session_id, days_forecast
         )
@@ -264,11 +274,16 @@ class AIPoHandler:
 
             current_stock[med_id] = to_native(med_details.get("current_stock", 0))
 
-            history = self.data_loader.get_medication_consumption_history(
-                med_id, days=90
-            )
-            if not history.get("error"):
-                consumption_history[med_id] = history
+            try:
+                consumption_history[med_id] = (
+                    self.data_loader.get_medication_consumption_history(
+                        med_id, days=90
+                    )
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to load consumption history for {med_id}: {str(e)}"
+                )
 
         suppliers = self.data_loader.get_suppliers()
         return medications, current_stock, consumption_history, suppliers
@@ -297,14 +312,13 @@ class AIPoHandler:
                         datetime.utcnow().isoformat() + "Z"
                     )
                     logger.info(f"📊 Updated session progress: {progress_data}")
+                    self._notify_session(temp_session_id)
                 else:
                     logger.warning(
                         f"⚠️ Session {temp_session_id} not found in active_sessions"
                     )
 
             # Run workflow (synchronously inside this task)
-            import asyncio
-
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             result = loop.run_until_complete(
@@ -328,6 +342,7 @@ class AIPoHandler:
                 "result": result,
                 "progress": result.get("progress", {}),
             }
+            self._notify_session(temp_session_id)
         except Exception as e:
             logger.error(f"Background generation failed: {e}", exc_info=True)
             now_iso = datetime.utcnow().isoformat() + "Z"
@@ -344,6 +359,7 @@ class AIPoHandler:
                     "percent_complete": 0,
                 },
             }
+            self._notify_session(temp_session_id)
 
     async def get_status(self, session_id: str) -> Dict[str, Any]:
         """Get status of AI PO generation session"""
@@ -364,6 +380,34 @@ class AIPoHandler:
         status = await self.workflow.get_status(session_id)
         return status
 
+    def _notify_session(self, session_id: str):
+        """Wake status long-polls for a session; safe to call from worker threads"""
+        event = self._session_events.get(session_id)
+        if event is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(event.set)
+
+    async def wait_for_change(
+        self, session_id: str, since: Optional[str], timeout: float
+    ) -> Dict[str, Any]:
+        """Return session status once its updated_at differs from since, or on timeout"""
+        status = await self.get_status(session_id)
+        if since is None or status.get("updated_at") != since or timeout <= 0:
+            return status
+
+        event = self._session_events.setdefault(session_id, asyncio.Event())
+        event.clear()
+
+        # Re-check after clearing so an update in between is not missed
+        status = await self.get_status(session_id)
+        if status.get("updated_at") != since:
+            return status
+
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await self.get_status(session_id)
+
     async def get_result(self, session_id: str) -> Dict[str, Any]:
         """Get result of completed AI PO generation"""
 
@@ -393,17 +437,25 @@ class AIPoHandler:
                     "avg_lead_time": item.get("lead_time", 7),
                 }
 
+            quantity = item.get("quantity") or 0
+            unit_price = item.get("unit_price") or 0
+            subtotal = item.get("subtotal")
+            if subtotal is None:
+                subtotal = quantity * unit_price
+
+            # total_price is the column name save_purchase_orders writes
             supplier_pos[supplier_id]["items"].append(
                 {
                     "med_id": item.get("med_id"),
                     "med_name": item.get("med_name"),
-                    "quantity": item.get("quantity"),
-                    "unit_price": item.get("unit_price"),
-                    "subtotal": item.get("subtotal"),
+                    "quantity": quantity,
+                    "unit_price": unit_price,
+                    "subtotal": subtotal,
+                    "total_price": subtotal,
                 }
             )
 
-            supplier_pos[supplier_id]["total_amount"] += item.get("subtotal", 0)
+            supplier_pos[supplier_id]["total_amount"] += subtotal
 
         # Convert to list
         po_list = []
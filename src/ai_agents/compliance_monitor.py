@@ -294,6 +294,9 @@ class ComplianceMonitor:
             'low_90_days': []
         }
 
+        # One reference time for the whole pass keeps categories consistent
+        now = datetime.now()
+
         for batch in batch_info:
             days_until_expiry = None
             expiry_date = batch.get('expiry_date')
@@ -302,7 +305,7 @@ class ComplianceMonitor:
                 try:
                     if isinstance(expiry_date, str):
                         expiry_date = parser.parse(expiry_date)
-                    days_until_expiry = (expiry_date - datetime.now()).days
+                    days_until_expiry = (expiry_date - now).days
 
                     batch_summary = {
                         'batch_id': batch.get('batch_id'),
@@ -5,23 +5,21 @@ Analytics API endpoints for KPIs, trends, and performance metrics
 import csv
 import io
 import json
-import os
-import sys
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from loguru import logger
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data_loader import DataLoader
 from services.report_ai_handler import ReportAIHandler
 from services.pdf_generator import PDFReportGenerator
 
 # Initialize router
-router = APIRouter(prefix="/analytics", tags=["analytics"])
+router = APIRouter(
+    prefix="/analytics", tags=["analytics"], default_response_class=ORJSONResponse
+)
 
 # Global data loader instance
 data_loader = DataLoader()
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional, Union
 import pandas as pd
@@ -42,7 +43,7 @@ log_level = logging.DEBUG if debug_mode else logging.WARNING
 logging.basicConfig(level=log_level)
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 
 class ChatMessage(BaseModel):
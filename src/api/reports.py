@@ -2,35 +2,60 @@
 Reports API endpoints for template management, generation, and export
 """
 
+import asyncio
 import csv
 import io
 import json
+import multiprocessing
 import os
-import sys
+import sqlite3
+import time
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data_loader import DataLoader
 from services.report_ai_handler import ReportAIHandler
-from services.pdf_generator import PDFReportGenerator
+from services.pdf_generator import render_combined_report_pdf, render_report_pdf
+from services.pdf_cache import PDFCache
+from utils.cache_manager import CacheManager
 
 # Initialize router
-router = APIRouter(prefix="/reports", tags=["reports"])
+router = APIRouter(
+    prefix="/reports", tags=["reports"], default_response_class=ORJSONResponse
+)
 
 # Global data loader instance
 data_loader = DataLoader()
 
-# Initialize AI handler and PDF generator
+# Initialize AI handler and PDF cache
 report_ai_handler = ReportAIHandler()
-pdf_generator = PDFReportGenerator()
+pdf_cache = PDFCache()
+
+# PDF rendering is CPU-bound, so it runs in worker processes off the event loop
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", os.cpu_count() or 1))
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+# Parsed template rows; invalidated when a template is changed through the API
+template_cache = CacheManager(default_ttl_seconds=60)
+
+# Generated report rows, shared between viewers of the same report; keys vary by
+# parameters and hour, so cap the entry count to keep memory bounded
+report_data_cache = CacheManager(default_ttl_seconds=300, max_entries=512)
+
+# Failed runs are queued and written to report_history in batches
+FAILURE_FLUSH_INTERVAL_SECONDS = 0.5
+FAILURE_BATCH_SIZE = 100
+_failure_queue: Optional[asyncio.Queue] = None
+_failure_writer: Optional[asyncio.Task] = None
 
 # Logger
 reports_logger = logger.bind(name="reports")
@@ -38,6 +63,8 @@ reports_logger = logger.bind(name="reports")
 
 # Pydantic models for request/response
 class ReportTemplate(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     name: str
     description: Optional[str] = None
     type: str  # inventory, financial, supplier, consumption, custom
@@ -51,6 +78,8 @@ class ReportTemplate(BaseModel):
 
 
 class UpdateReportTemplate(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     name: Optional[str] = None
     description: Optional[str] = None
     template_data: Optional[Dict[str, Any]] = None
@@ -64,15 +93,37 @@ class UpdateReportTemplate(BaseModel):
 
 
 class RunReportRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     parameters: Optional[Dict[str, Any]] = None
     format: Optional[str] = None
 
 
 class ExportReportRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
     format: str  # pdf, excel, csv
     parameters: Optional[Dict[str, Any]] = None
 
 
+class BatchExportItem(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    template_id: int
+    parameters: Optional[Dict[str, Any]] = None
+
+
+# Template columns stored as JSON text, with the value used when a column is empty
+_JSON_FIELD_DEFAULTS = {
+    "template_data": dict,
+    "fields_config": dict,
+    "chart_config": lambda: None,
+    "recipients": list,
+    "parameters": dict,
+}
+_JSON_FIELDS = frozenset(_JSON_FIELD_DEFAULTS)
+
+
 # Default report templates
 DEFAULT_TEMPLATES = [
     {
@@ -526,6 +577,40 @@ DEFAULT_TEMPLATES = [
     },
 ]
 
+# Column-oriented, pre-serialized form of DEFAULT_TEMPLATES used for seeding.
+# Columns follow DEFAULT_TEMPLATE_FIELDS; rows are rebuilt with zip(*...).
+DEFAULT_TEMPLATE_FIELDS = (
+    "name",
+    "description",
+    "type",
+    "template_data",
+    "fields_config",
+    "chart_config",
+    "format",
+    "frequency",
+    "recipients",
+    "parameters",
+)
+DEFAULT_TEMPLATE_COLUMNS = tuple(
+    zip(
+        *(
+            (
+                t["name"],
+                t.get("description", ""),
+                t["type"],
+                json.dumps(t["template_data"]),
+                json.dumps(t["fields_config"]),
+                json.dumps(t["chart_config"]) if t.get("chart_config") else None,
+                t.get("format", "pdf"),
+                t.get("frequency", "manual"),
+                json.dumps(t.get("recipients", [])),
+                json.dumps(t.get("parameters", {})),
+            )
+            for t in DEFAULT_TEMPLATES
+        )
+    )
+)
+
 
 @router.get("/templates")
 async def get_report_templates(
@@ -546,27 +631,15 @@ async def get_report_templates(
         # If no templates exist, create default templates
         if template_count == 0:
             reports_logger.info("No templates found, creating default templates")
-            for template in DEFAULT_TEMPLATES:
-                cursor.execute(
-                    """
-                    INSERT INTO report_templates 
-                    (name, description, type, template_data, fields_config, chart_config, 
-                     format, frequency, recipients, parameters, created_by)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'system')
-                """,
-                    (
-                        template["name"],
-                        template["description"],
-                        template["type"],
-                        json.dumps(template["template_data"]),
-                        json.dumps(template["fields_config"]),
-                        json.dumps(template.get("chart_config")),
-                        template["format"],
-                        template["frequency"],
-                        json.dumps(template.get("recipients", [])),
-                        json.dumps(template.get("parameters", {})),
-                    ),
-                )
+            cursor.executemany(
+                """
+                INSERT INTO report_templates 
+                (name, description, type, template_data, fields_config, chart_config, 
+                 format, frequency, recipients, parameters, created_by)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'system')
+            """,
+                zip(*DEFAULT_TEMPLATE_COLUMNS),
+            )
             conn.commit()
 
         # Build query
@@ -588,25 +661,10 @@ async def get_report_templates(
         cursor.execute(query, params)
         results = cursor.fetchall()
 
-        templates = []
-        for row in results:
-            template = {
-                "id": row[0],
-                "name": row[1],
-                "description": row[2],
-                "type": row[3],
-                "template_data": json.loads(row[4]) if row[4] else {},
-                "fields_config": json.loads(row[5]) if row[5] else {},
-                "chart_config": json.loads(row[6]) if row[6] else None,
-                "format": row[7],
-                "frequency": row[8],
-                "recipients": json.loads(row[9]) if row[9] else [],
-                "parameters": json.loads(row[10]) if row[10] else {},
-                "created_by": row[11],
-                "created_at": row[12],
-                "updated_at": row[13],
-                "is_active": bool(row[14]),
-            }
+        templates = [dict(row) for row in results]
+        for template in templates:
+            _decode_template_json(template)
+            template["is_active"] = bool(template["is_active"])
 
             # Add last run info if available
             cursor.execute(
@@ -621,8 +679,6 @@ async def get_report_templates(
                 template["lastRun"] = last_run[0]
                 template["lastStatus"] = last_run[1]
 
-            templates.append(template)
-
         conn.close()
 
         return templates
@@ -688,49 +744,22 @@ async def update_report_template(
         conn = data_loader.get_connection()
         cursor = conn.cursor()
 
-        # Build update query dynamically
+        # Build update query from the fields the client actually sent
         update_fields = []
         params = []
 
-        if template.name is not None:
-            update_fields.append("name = ?")
-            params.append(template.name)
-        if template.description is not None:
-            update_fields.append("description = ?")
-            params.append(template.description)
-        if template.template_data is not None:
-            update_fields.append("template_data = ?")
-            params.append(json.dumps(template.template_data))
-        if template.fields_config is not None:
-            update_fields.append("fields_config = ?")
-            params.append(json.dumps(template.fields_config))
-        if template.chart_config is not None:
-            update_fields.append("chart_config = ?")
-            params.append(json.dumps(template.chart_config))
-        if template.format is not None:
-            update_fields.append("format = ?")
-            params.append(template.format)
-        if template.frequency is not None:
-            update_fields.append("frequency = ?")
-            params.append(template.frequency)
-        if template.recipients is not None:
-            update_fields.append("recipients = ?")
-            params.append(json.dumps(template.recipients))
-        if template.parameters is not None:
-            update_fields.append("parameters = ?")
-            params.append(json.dumps(template.parameters))
-        if template.is_active is not None:
-            update_fields.append("is_active = ?")
-            params.append(template.is_active)
-
-        update_fields.append("updated_at = ?")
-        params.append(datetime.now().isoformat())
-
-        params.append(template_id)
+        for field, value in template.model_dump(exclude_unset=True).items():
+            update_fields.append(f"{field} = ?")
+            if field in _JSON_FIELDS and value is not None:
+                value = json.dumps(value)
+            params.append(value)
 
         if not update_fields:
             raise HTTPException(status_code=400, detail="No fields to update")
 
+        update_fields.append("updated_at = CURRENT_TIMESTAMP")
+        params.append(template_id)
+
         query = f"UPDATE report_templates SET {', '.join(update_fields)} WHERE id = ?"
         cursor.execute(query, params)
 
@@ -740,10 +769,14 @@ async def update_report_template(
         conn.commit()
         conn.close()
 
+        template_cache.invalidate(f"template:{template_id}:")
+
         return {"message": "Template updated successfully"}
 
     except HTTPException:
         raise
+    except sqlite3.IntegrityError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid template update: {str(e)}")
     except Exception as e:
         reports_logger.error(f"Error updating report template: {str(e)}")
         raise HTTPException(
@@ -768,6 +801,8 @@ async def delete_report_template(template_id: int) -> Dict[str, Any]:
         conn.commit()
         conn.close()
 
+        template_cache.invalidate(f"template:{template_id}:")
+
         return {"message": "Template deleted successfully"}
 
     except HTTPException:
@@ -782,93 +817,55 @@ async def delete_report_template(template_id: int) -> Dict[str, Any]:
 @router.post("/templates/{template_id}/run")
 async def run_report(template_id: int, request: RunReportRequest) -> Dict[str, Any]:
     """Run a report and return the data"""
+    # Request overrides until the template loads; failures record whatever is
+    # merged by then, matching what a completed run stores
+    parameters = dict(request.parameters or {})
     try:
         reports_logger.info(f"Running report for template: {template_id}")
 
-        conn = data_loader.get_connection()
-        cursor = conn.cursor()
-
         # Get template
-        cursor.execute("SELECT * FROM report_templates WHERE id = ?", (template_id,))
-        template_row = cursor.fetchone()
+        template = await _load_template(template_id)
 
-        if not template_row:
+        if not template:
             raise HTTPException(status_code=404, detail="Template not found")
 
-        json.loads(template_row[4]) if template_row[4] else {}
-        json.loads(template_row[5]) if template_row[5] else {}
-        report_type = template_row[3]
+        report_type = template["type"]
 
-        # Merge parameters
-        parameters = json.loads(template_row[10]) if template_row[10] else {}
-        if request.parameters:
-            parameters.update(request.parameters)
+        # Merge parameters (copy, the template dict is shared through the cache)
+        parameters = {**template["parameters"], **parameters}
 
         # Record execution start
         execution_id = str(uuid.uuid4())
-        start_time = datetime.now()
-
-        cursor.execute(
-            """
-            INSERT INTO report_history 
-            (template_id, parameters, status, executed_by)
-            VALUES (?, ?, 'running', 'api')
-        """,
-            (template_id, json.dumps(parameters)),
-        )
-
-        history_id = cursor.lastrowid
-        conn.commit()
+        generated_at = datetime.now().isoformat()
+        start_ns = time.perf_counter_ns()
 
         # Generate report data based on type
-        report_data = await _generate_report_data(report_type, parameters, cursor)
+        report_data = await _generate_report_data(report_type, parameters)
 
-        # Calculate execution time
-        end_time = datetime.now()
-        execution_time = (end_time - start_time).total_seconds() * 1000
+        # Calculate execution time on the monotonic clock
+        execution_time = (time.perf_counter_ns() - start_ns) / 1e6
 
-        # Update execution record
-        cursor.execute(
-            """
-            UPDATE report_history 
-            SET status = 'completed', execution_time_ms = ?
-            WHERE id = ?
-        """,
-            (execution_time, history_id),
+        # Record the finished execution in a single write
+        await _execute(
+            _INSERT_COMPLETED_RUN_SQL,
+            (template_id, json.dumps(parameters), execution_time),
         )
 
-        conn.commit()
-        conn.close()
-
         return {
             "template_id": template_id,
             "execution_id": execution_id,
             "data": report_data,
             "parameters": parameters,
             "execution_time_ms": execution_time,
-            "generated_at": start_time.isoformat(),
+            "generated_at": generated_at,
         }
 
     except HTTPException:
         raise
     except Exception as e:
         reports_logger.error(f"Error running report: {str(e)}")
-        # Update execution record with error
-        try:
-            conn = data_loader.get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                UPDATE report_history 
-                SET status = 'failed', error_message = ?
-                WHERE template_id = ? AND status = 'running'
-            """,
-                (str(e), template_id),
-            )
-            conn.commit()
-            conn.close()
-        except Exception:
-            pass
+        # Record the failed execution without delaying the error response
+        _record_failure(template_id, parameters, str(e))
         raise HTTPException(status_code=500, detail=f"Error running report: {str(e)}")
 
 
@@ -881,32 +878,15 @@ async def export_report(template_id: int, request: ExportReportRequest):
         )
 
         # Get template details
-        conn = data_loader.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM report_templates WHERE id = ?", (template_id,))
-        template_row = cursor.fetchone()
+        template = await _load_template(template_id)
 
-        if not template_row:
+        if not template:
             raise HTTPException(status_code=404, detail="Template not found")
 
-        # Parse template data
-        template = {
-            "id": template_row[0],
-            "name": template_row[1],
-            "description": template_row[2],
-            "type": template_row[3],
-            "template_data": json.loads(template_row[4]) if template_row[4] else {},
-            "fields_config": json.loads(template_row[5]) if template_row[5] else {},
-            "format": template_row[7],
-            "frequency": template_row[8],
-        }
-
         # Generate report data
         report_type = template["type"]
         parameters = request.parameters or {}
-        report_data = await _generate_report_data(report_type, parameters, cursor)
-
-        conn.close()
+        report_data = await _generate_report_data(report_type, parameters)
 
         # Handle different export formats
         if request.format.lower() == "csv":
@@ -915,24 +895,45 @@ async def export_report(template_id: int, request: ExportReportRequest):
 
         elif request.format.lower() == "excel":
             # Excel export (can be enhanced with openpyxl later)
-            return _export_csv({"data": report_data})  # Using CSV for now
+            return _export_excel({"data": report_data})
 
         elif request.format.lower() == "pdf":
-            # PDF export with AI insights
-            reports_logger.info("Generating AI insights for PDF export")
-
-            # Generate AI insights
-            ai_insights = await report_ai_handler.generate_insights_for_report(
-                report_type=report_type, report_data=report_data, parameters=parameters
+            # Start AI insights as soon as the data is ready so the LLM call
+            # overlaps with hashing the inputs and the PDF cache lookup
+            insights_task = asyncio.create_task(
+                report_ai_handler.generate_insights_for_report(
+                    report_type=report_type,
+                    report_data=report_data,
+                    parameters=parameters,
+                )
             )
 
-            # Generate PDF with insights
-            pdf_content = pdf_generator.generate_report_pdf(
-                template=template, data=report_data, ai_insights=ai_insights
-            )
+            try:
+                # PDF export with AI insights, reusing an identical earlier render
+                cache_key = await asyncio.to_thread(
+                    pdf_cache.make_key, template, parameters, report_data
+                )
+                pdf_content = await asyncio.to_thread(pdf_cache.get, cache_key)
+
+                if pdf_content is None:
+                    reports_logger.info("Generating AI insights for PDF export")
+                    ai_insights = await insights_task
+
+                    # Generate PDF with insights
+                    pdf_content = await _render_pdf(
+                        render_report_pdf, template, report_data, ai_insights
+                    )
+                    await asyncio.to_thread(pdf_cache.put, cache_key, pdf_content)
+                else:
+                    reports_logger.info(
+                        f"Serving cached PDF for template: {template_id}"
+                    )
+            finally:
+                # No-op once awaited; stops the LLM call on a cache hit or error
+                insights_task.cancel()
 
             # Return PDF as streaming response
-            filename = f"{template['name'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            filename = f"{template['safe_name']}_{time.strftime('%Y%m%d_%H%M%S')}.pdf"
             return StreamingResponse(
                 io.BytesIO(pdf_content),
                 media_type="application/pdf",
@@ -948,56 +949,147 @@ async def export_report(template_id: int, request: ExportReportRequest):
         raise HTTPException(status_code=500, detail=f"Error exporting report: {str(e)}")
 
 
+@router.post("/export/batch")
+async def export_reports_batch(requests: List[BatchExportItem]):
+    """Export several reports as one combined PDF with AI insights"""
+    try:
+        if not requests:
+            raise HTTPException(status_code=400, detail="No reports requested")
+
+        reports_logger.info(f"Exporting batch of {len(requests)} reports as PDF")
+
+        reports = []
+        insights_tasks = []
+        try:
+            for item in requests:
+                template = await _load_template(item.template_id)
+                if not template:
+                    raise HTTPException(
+                        status_code=404,
+                        detail=f"Template not found: {item.template_id}",
+                    )
+
+                parameters = item.parameters or {}
+                report_data = await _generate_report_data(
+                    template["type"], parameters
+                )
+
+                # Start each report's AI insights while the remaining data loads
+                insights_tasks.append(
+                    asyncio.create_task(
+                        report_ai_handler.generate_insights_for_report(
+                            report_type=template["type"],
+                            report_data=report_data,
+                            parameters=parameters,
+                        )
+                    )
+                )
+                cache_key = await asyncio.to_thread(
+                    pdf_cache.make_key, template, parameters, report_data
+                )
+                reports.append(
+                    {
+                        "template": template,
+                        "parameters": parameters,
+                        "data": report_data,
+                        "cache_key": cache_key,
+                    }
+                )
+
+            batch_key = pdf_cache.make_batch_key([r["cache_key"] for r in reports])
+            pdf_content = await asyncio.to_thread(pdf_cache.get, batch_key)
+
+            if pdf_content is None:
+                insights = await asyncio.gather(*insights_tasks)
+                for report, ai_insights in zip(reports, insights):
+                    report["ai_insights"] = ai_insights
+
+                # Render all reports in a single document build
+                pdf_content = await _render_pdf(render_combined_report_pdf, reports)
+                await asyncio.to_thread(pdf_cache.put, batch_key, pdf_content)
+        finally:
+            # Stop any insight calls still running after a cache hit or error
+            for task in insights_tasks:
+                task.cancel()
+
+        filename = f"Reports_Batch_{time.strftime('%Y%m%d_%H%M%S')}.pdf"
+        return StreamingResponse(
+            io.BytesIO(pdf_content),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        reports_logger.error(f"Error exporting report batch: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error exporting report batch: {str(e)}"
+        )
+
+
 @router.get("/history")
 async def get_report_history(
+    response: Response,
     template_id: Optional[int] = Query(None, description="Filter by template ID"),
     limit: int = Query(50, ge=1, le=1000, description="Limit results"),
-    offset: int = Query(0, ge=0, description="Offset for pagination"),
+    before: Optional[str] = Query(
+        None, description="Keyset cursor from the previous page's X-Next-Cursor header"
+    ),
+    offset: int = Query(
+        0, ge=0, description="Offset for pagination (deprecated, use before)"
+    ),
 ) -> List[Dict[str, Any]]:
-    """Get report execution history"""
+    """Get report execution history, newest first"""
     try:
         reports_logger.info("Getting report history")
 
-        conn = data_loader.get_connection()
-        cursor = conn.cursor()
-
         query = """
-            SELECT rh.*, rt.name as template_name, rt.type as template_type
+            SELECT rh.id, rh.template_id, rh.executed_at, rh.parameters, rh.status,
+                   rh.file_path, rh.file_size, rh.execution_time_ms,
+                   rh.error_message, rh.executed_by,
+                   rt.name as template_name, rt.type as template_type
             FROM report_history rh
             JOIN report_templates rt ON rh.template_id = rt.id
         """
+        where_clauses = []
         params = []
 
         if template_id:
-            query += " WHERE rh.template_id = ?"
+            where_clauses.append("rh.template_id = ?")
             params.append(template_id)
 
-        query += " ORDER BY rh.executed_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
+        if before:
+            # Cursor is "<executed_at>|<id>"; id breaks ties within the same second
+            executed_at, _, last_id = before.rpartition("|")
+            if executed_at and last_id.isdigit():
+                where_clauses.append("(rh.executed_at, rh.id) < (?, ?)")
+                params.extend([executed_at, int(last_id)])
+            else:
+                where_clauses.append("rh.executed_at < ?")
+                params.append(before)
 
-        cursor.execute(query, params)
-        results = cursor.fetchall()
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
 
-        history = []
-        for row in results:
-            history.append(
-                {
-                    "id": row[0],
-                    "template_id": row[1],
-                    "template_name": row[10],
-                    "template_type": row[11],
-                    "executed_at": row[2],
-                    "parameters": json.loads(row[3]) if row[3] else {},
-                    "status": row[4],
-                    "file_path": row[5],
-                    "file_size": row[6],
-                    "execution_time_ms": row[7],
-                    "error_message": row[8],
-                    "executed_by": row[9],
-                }
+        query += " ORDER BY rh.executed_at DESC, rh.id DESC LIMIT ?"
+        params.append(limit)
+
+        if offset and not before:
+            query += " OFFSET ?"
+            params.append(offset)
+
+        results = await _fetchall(query, params)
+
+        history = [dict(row) for row in results]
+        for entry in history:
+            entry["parameters"] = (
+                orjson.loads(entry["parameters"]) if entry["parameters"] else {}
             )
 
-        conn.close()
+        if len(history) == limit:
+            last = history[-1]
+            response.headers["X-Next-Cursor"] = f"{last['executed_at']}|{last['id']}"
 
         return history
 
@@ -1008,26 +1100,422 @@ async def get_report_history(
         )
 
 
+# Report SQL. Statements are module constants so every call passes the same
+# text and hits the per-connection statement cache of pooled connections.
+# Only the columns the run and export paths read; audit columns are skipped
+_TEMPLATE_BY_ID_SQL = """
+    SELECT id, name, description, type, template_data, fields_config,
+           chart_config, format, frequency, parameters, is_active
+    FROM report_templates
+    WHERE id = ?
+"""
+
+_INSERT_COMPLETED_RUN_SQL = """
+    INSERT INTO report_history
+    (template_id, parameters, status, execution_time_ms, executed_by)
+    VALUES (?, ?, 'completed', ?, 'api')
+"""
+
+_INSERT_FAILED_RUN_SQL = """
+    INSERT INTO report_history
+    (template_id, parameters, status, error_message, executed_by)
+    VALUES (?, ?, 'failed', ?, 'api')
+"""
+
+_INVENTORY_SQL = """
+    SELECT 
+        m.name,
+        m.category,
+        COALESCE(ch.on_hand, 0) as current_stock,
+        COALESCE(ac.avg_daily * 30, 100) as reorder_point,
+        s.name as supplier,
+        CASE 
+            WHEN ac.avg_daily > 0 THEN ch.on_hand / ac.avg_daily
+            ELSE 30
+        END as days_supply
+    FROM medications m
+    LEFT JOIN consumption_history ch ON ch.id = (
+        -- Latest row per medication: a backwards seek on (med_id, date)
+        SELECT latest.id FROM consumption_history latest
+        WHERE latest.med_id = m.med_id
+        ORDER BY latest.date DESC
+        LIMIT 1
+    )
+    LEFT JOIN (
+        SELECT med_id, AVG(qty_dispensed) as avg_daily
+        FROM consumption_history
+        WHERE date >= date('now', '-30 days')
+        GROUP BY med_id
+    ) ac ON m.med_id = ac.med_id
+    LEFT JOIN suppliers s ON m.supplier_id = s.supplier_id
+"""
+_INVENTORY_ALL_SQL = _INVENTORY_SQL + " ORDER BY m.category, m.name"
+_INVENTORY_LOW_STOCK_SQL = (
+    _INVENTORY_SQL
+    + " WHERE COALESCE(ch.on_hand, 0) <= COALESCE(ac.avg_daily * 30, 100)"
+    + " ORDER BY m.category, m.name"
+)
+
+_FINANCIAL_SQL = """
+    SELECT 
+        strftime('%Y-%m', created_at) as period,
+        SUM(total_amount) as revenue,
+        COUNT(*) as orders,
+        AVG(total_amount) as avg_order_value
+    FROM purchase_orders
+    WHERE created_at >= date('now', '-12 months')
+    GROUP BY strftime('%Y-%m', created_at)
+    ORDER BY period
+"""
+
+_SUPPLIER_SQL = """
+    WITH recent_po AS (
+        SELECT supplier_id, po_id, actual_delivery_date, requested_delivery_date
+        FROM purchase_orders
+        WHERE created_at >= date('now', '-6 months')
+    ),
+    supplier_stats AS (
+        SELECT
+            s.supplier_id,
+            s.name,
+            s.avg_lead_time,
+            COUNT(po.po_id) as orders,
+            SUM(CASE
+                WHEN po.actual_delivery_date <= po.requested_delivery_date
+                THEN 1 ELSE 0
+            END) as on_time_orders,
+            AVG(CASE
+                WHEN po.actual_delivery_date > po.requested_delivery_date
+                THEN julianday(po.actual_delivery_date) - julianday(po.requested_delivery_date)
+                ELSE 0
+            END) as avg_delay
+        FROM suppliers s
+        LEFT JOIN recent_po po ON s.supplier_id = po.supplier_id
+        WHERE s.status = 'OK' OR s.status IS NULL
+        GROUP BY s.supplier_id, s.name, s.avg_lead_time
+    )
+    SELECT
+        name,
+        orders,
+        COALESCE(on_time_orders, 0) as on_time_orders,
+        COALESCE(avg_delay, 0) as avg_delay,
+        CASE
+            WHEN orders = 0 THEN 4.0
+            WHEN on_time_orders * 100.0 / orders >= 95 THEN 4.8
+            WHEN on_time_orders * 100.0 / orders >= 90 THEN 4.5
+            WHEN on_time_orders * 100.0 / orders >= 85 THEN 4.2
+            ELSE 4.0
+        END as rating,
+        avg_lead_time
+    FROM supplier_stats
+    ORDER BY orders DESC, name ASC
+"""
+
+_CONSUMPTION_SQL = """
+    SELECT 
+        strftime('%Y-%m', date) as period,
+        SUM(qty_dispensed) as consumption,
+        COUNT(DISTINCT po.po_id) as orders
+    FROM consumption_history ch
+    LEFT JOIN medications m ON ch.med_id = m.med_id
+    LEFT JOIN purchase_orders po ON m.supplier_id = po.supplier_id 
+        AND date(po.created_at) = ch.date
+    WHERE ch.date >= ? AND ch.date <= ?
+    GROUP BY strftime('%Y-%m', date)
+    ORDER BY period
+"""
+
+_CHAOS_METRICS_SQL = """
+    SELECT
+        metric_name,
+        current_chaos_score,
+        optimal_score,
+        improvement_potential
+    FROM warehouse_chaos_metrics
+    ORDER BY improvement_potential DESC
+"""
+
+_FRAGMENTATION_SQL = """
+    SELECT
+        COUNT(DISTINCT b.batch_id) as fragmented_batches,
+        COUNT(DISTINCT mp.position_id) as total_positions,
+        SUM(mp.quantity) as total_quantity
+    FROM medication_placements mp
+    JOIN batch_info b ON mp.batch_id = b.batch_id
+    WHERE mp.is_active = 1
+    GROUP BY b.batch_id
+    HAVING COUNT(DISTINCT mp.position_id) > 1
+"""
+
+_VELOCITY_MISMATCH_SQL = """
+    SELECT COUNT(*) as mismatches
+    FROM medication_placements mp
+    JOIN medications m ON mp.med_id = m.med_id
+    JOIN medication_attributes ma ON m.med_id = ma.med_id
+    JOIN shelf_positions sp ON mp.position_id = sp.position_id
+    WHERE mp.is_active = 1
+    AND ((ma.movement_category = 'Fast' AND sp.grid_y = 3)
+        OR (ma.movement_category = 'Slow' AND sp.grid_y = 1))
+"""
+
+_COMPLIANCE_SQL = """
+    SELECT
+        m.name as item_name,
+        b.lot_number as batch_number,
+        b.expiry_date,
+        julianday(b.expiry_date) - julianday('now') as days_remaining,
+        CASE
+            WHEN julianday(b.expiry_date) - julianday('now') <= 0 THEN 'Expired'
+            WHEN julianday(b.expiry_date) - julianday('now') <= 7 THEN 'Critical'
+            WHEN julianday(b.expiry_date) - julianday('now') <= 30 THEN 'Warning'
+            ELSE 'OK'
+        END as status,
+        'Immediate rotation required' as action_required
+    FROM medication_placements mp
+    JOIN batch_info b ON mp.batch_id = b.batch_id
+    JOIN medications m ON mp.med_id = m.med_id
+    WHERE mp.is_active = 1
+    AND julianday(b.expiry_date) - julianday('now') <= 30
+    ORDER BY days_remaining
+    LIMIT 50
+"""
+
+_PLACEMENT_SQL = """
+    SELECT
+        m.name as item_name,
+        a.aisle_code || '-' || s.shelf_code || '-' || sp.grid_label as current_location,
+        CASE ma.movement_category
+            WHEN 'Fast' THEN 'A1-S1-P1'
+            WHEN 'Medium' THEN 'B1-S1-P5'
+            ELSE 'C1-S2-P8'
+        END as optimal_location,
+        ma.movement_category as velocity_category,
+        ma.velocity_score * 2.5 as time_savings
+    FROM medication_placements mp
+    JOIN medications m ON mp.med_id = m.med_id
+    JOIN medication_attributes ma ON m.med_id = ma.med_id
+    JOIN shelf_positions sp ON mp.position_id = sp.position_id
+    JOIN warehouse_shelves s ON sp.shelf_id = s.shelf_id
+    JOIN warehouse_aisles a ON s.aisle_id = a.aisle_id
+    WHERE mp.is_active = 1
+    AND ((ma.movement_category = 'Fast' AND sp.grid_y = 3)
+        OR (ma.movement_category = 'Slow' AND sp.grid_y = 1))
+    LIMIT 50
+"""
+
+_MOVEMENT_SQL = """
+    SELECT
+        movement_type || ' - ' || COALESCE(a.aisle_code || '-' || s.shelf_code, 'Unknown') as route,
+        COUNT(*) as frequency,
+        ROUND(AVG(sp.grid_x * 3 + sp.grid_y * 2), 1) as distance,
+        COUNT(*) * 15 as avg_time,
+        'Optimize path' as optimization
+    FROM movement_history mh
+    LEFT JOIN shelf_positions sp ON mh.position_id = sp.position_id
+    LEFT JOIN warehouse_shelves s ON sp.shelf_id = s.shelf_id
+    LEFT JOIN warehouse_aisles a ON s.aisle_id = a.aisle_id
+    WHERE mh.movement_date >= datetime('now', '-30 days')
+    GROUP BY movement_type, a.aisle_code, s.shelf_code
+    HAVING COUNT(*) > 5
+    ORDER BY frequency DESC
+    LIMIT 50
+"""
+
+
 # Helper functions
+def _query_all(query: str, params) -> List[sqlite3.Row]:
+    with data_loader.pooled_connection() as conn:
+        return conn.execute(query, params).fetchall()
+
+
+def _query_one(query: str, params) -> Optional[sqlite3.Row]:
+    with data_loader.pooled_connection() as conn:
+        return conn.execute(query, params).fetchone()
+
+
+def _execute_write(query: str, params) -> int:
+    with data_loader.pooled_connection() as conn:
+        cursor = conn.execute(query, params)
+        conn.commit()
+        return cursor.lastrowid
+
+
+async def _fetchall(query: str, params=()) -> List[sqlite3.Row]:
+    """Run a read query on a pooled connection without blocking the event loop"""
+    return await asyncio.to_thread(_query_all, query, params)
+
+
+async def _fetchone(query: str, params=()) -> Optional[sqlite3.Row]:
+    """Fetch a single row on a pooled connection without blocking the event loop"""
+    return await asyncio.to_thread(_query_one, query, params)
+
+
+async def _execute(query: str, params=()) -> int:
+    """Run and commit a write on a pooled connection, returning lastrowid"""
+    return await asyncio.to_thread(_execute_write, query, params)
+
+
+def _record_failure(template_id: int, parameters: Dict[str, Any], error: str) -> None:
+    """Queue a failed run for the background history writer"""
+    global _failure_queue, _failure_writer
+
+    if _failure_queue is None:
+        _failure_queue = asyncio.Queue()
+    _failure_queue.put_nowait((template_id, json.dumps(parameters), error))
+
+    if _failure_writer is None or _failure_writer.done():
+        _failure_writer = asyncio.create_task(_write_failures())
+
+
+async def _write_failures() -> None:
+    """Drain queued failures into report_history with one executemany per batch
+
+    A None on the queue flushes what is left and stops the writer.
+    """
+    stopping = False
+    while not stopping:
+        item = await _failure_queue.get()
+        if item is None:
+            return
+        batch = [item]
+
+        # Give a burst of failures a moment to accumulate
+        await asyncio.sleep(FAILURE_FLUSH_INTERVAL_SECONDS)
+        while len(batch) < FAILURE_BATCH_SIZE and not _failure_queue.empty():
+            item = _failure_queue.get_nowait()
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+
+        try:
+            await asyncio.to_thread(_insert_failures, batch)
+        except Exception as e:
+            reports_logger.error(
+                f"Error recording {len(batch)} failed report runs: {str(e)}"
+            )
+
+
+async def shutdown_failure_writer() -> None:
+    """Write any queued failed runs and stop the background writer"""
+    if _failure_writer is None or _failure_writer.done():
+        return
+    _failure_queue.put_nowait(None)
+    await _failure_writer
+
+
+def _insert_failures(batch: List[tuple]) -> None:
+    with data_loader.pooled_connection() as conn:
+        conn.executemany(_INSERT_FAILED_RUN_SQL, batch)
+        conn.commit()
+
+
+async def _render_pdf(render, *args) -> bytes:
+    """Run a PDF render function in the process pool, creating it on first use"""
+    global _pdf_pool
+
+    if _pdf_pool is None:
+        # Spawn, not fork: forking would copy the event loop, open sqlite
+        # connections and held locks from this threaded server process
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return await asyncio.get_running_loop().run_in_executor(_pdf_pool, render, *args)
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the PDF worker processes"""
+    global _pdf_pool
+
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+@lru_cache(maxsize=1024)
+def _format_period(period: str, fmt: str) -> str:
+    """Format a YYYY-MM period label, falling back to the raw value
+
+    Reports repeat the same few months on every run, so labels are memoized.
+    """
+    try:
+        return datetime.strptime(period, "%Y-%m").strftime(fmt)
+    except (TypeError, ValueError):
+        return period
+
+
+def _decode_template_json(template: Dict[str, Any]) -> None:
+    """Parse the JSON text columns present in a template row dict in place"""
+    for field, default in _JSON_FIELD_DEFAULTS.items():
+        if field not in template:
+            continue
+        value = template[field]
+        template[field] = orjson.loads(value) if value else default()
+
+
+async def _load_template(template_id: int) -> Optional[Dict[str, Any]]:
+    """Load and parse a template, served from the template cache when fresh"""
+    cache_key = f"template:{template_id}:"
+    template = template_cache.get(cache_key)
+    if template is not None:
+        return template
+
+    template_row = await _fetchone(_TEMPLATE_BY_ID_SQL, (template_id,))
+
+    if not template_row:
+        return None
+
+    template = dict(template_row)
+    _decode_template_json(template)
+    template["is_active"] = bool(template["is_active"])
+    # Export filename stem, computed once per cache fill
+    template["safe_name"] = template["name"].replace(" ", "_")
+
+    template_cache.set(cache_key, template)
+    return template
+
+
 async def _generate_report_data(
-    report_type: str, parameters: Dict[str, Any], cursor
+    report_type: str, parameters: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Generate report data, reusing recent results for identical requests
+
+    Reports use date('now', ...) ranges, so the cache key includes the
+    current hour. Pass {"no_cache": true} in parameters to force a refresh.
+    """
+    if parameters.get("no_cache"):
+        return await _build_report_data(report_type, parameters)
+
+    cache_key = report_data_cache._generate_key(
+        f"report:{report_type}:{time.strftime('%Y%m%d%H')}", parameters
+    )
+    data = report_data_cache.get(cache_key)
+    if data is None:
+        data = await _build_report_data(report_type, parameters)
+        report_data_cache.set(cache_key, data)
+
+    return data
+
+
+async def _build_report_data(
+    report_type: str, parameters: Dict[str, Any]
 ) -> List[Dict[str, Any]]:
     """Generate report data based on type and parameters"""
 
     if report_type == "inventory":
-        return await _generate_inventory_report_data(parameters, cursor)
+        return await _generate_inventory_report_data(parameters)
     elif report_type == "financial":
-        return await _generate_financial_report_data(parameters, cursor)
+        return await _generate_financial_report_data(parameters)
     elif report_type == "supplier":
-        return await _generate_supplier_report_data(parameters, cursor)
+        return await _generate_supplier_report_data(parameters)
     elif report_type == "consumption":
-        return await _generate_consumption_report_data(parameters, cursor)
+        return await _generate_consumption_report_data(parameters)
     elif report_type == "warehouse_optimization":
-        return await _generate_warehouse_optimization_report_data(parameters, cursor)
+        return await _generate_warehouse_optimization_report_data(parameters)
     elif report_type == "custom":
         # Check if this is a warehouse optimization custom report
         if parameters.get("analysis_type") or parameters.get("focus") or parameters.get("include_ai_insights"):
-            return await _generate_warehouse_optimization_report_data(parameters, cursor)
+            return await _generate_warehouse_optimization_report_data(parameters)
         else:
             # Generic custom report - return empty data for now
             return [{"message": "Custom report data generation not implemented"}]
@@ -1038,7 +1526,7 @@ async def _generate_report_data(
 
 
 async def _generate_inventory_report_data(
-    parameters: Dict[str, Any], cursor
+    parameters: Dict[str, Any],
 ) -> List[Dict[str, Any]]:
     """Generate inventory report data"""
 
@@ -1046,168 +1534,70 @@ async def _generate_inventory_report_data(
     # TODO: Implement expired medication filtering using include_expired
     parameters.get("includeExpired", True)
 
-    # Base query for inventory data
-    query = """
-        SELECT 
-            m.name,
-            m.category,
-            COALESCE(ch.on_hand, 0) as current_stock,
-            COALESCE(ac.avg_daily * 30, 100) as reorder_point,
-            s.name as supplier,
-            CASE 
-                WHEN ac.avg_daily > 0 THEN ch.on_hand / ac.avg_daily
-                ELSE 30
-            END as days_supply
-        FROM medications m
-        LEFT JOIN (
-            SELECT med_id, on_hand, 
-                   ROW_NUMBER() OVER (PARTITION BY med_id ORDER BY date DESC) as rn
-            FROM consumption_history
-        ) ch ON m.med_id = ch.med_id AND ch.rn = 1
-        LEFT JOIN (
-            SELECT med_id, AVG(qty_dispensed) as avg_daily
-            FROM consumption_history
-            WHERE date >= date('now', '-30 days')
-            GROUP BY med_id
-        ) ac ON m.med_id = ac.med_id
-        LEFT JOIN suppliers s ON m.supplier_id = s.supplier_id
-    """
-
-    params = []
-
-    if low_stock_only:
-        query += " WHERE COALESCE(ch.on_hand, 0) <= COALESCE(ac.avg_daily * 30, 100)"
-
-    query += " ORDER BY m.category, m.name"
-
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-
-    data = []
-    for row in results:
-        data.append(
-            {
-                "name": row[0],
-                "category": row[1],
-                "current_stock": int(row[2]),
-                "reorder_point": int(row[3]),
-                "supplier": row[4] or "Unknown",
-                "days_supply": round(row[5], 1),
-            }
-        )
+    results = await _fetchall(
+        _INVENTORY_LOW_STOCK_SQL if low_stock_only else _INVENTORY_ALL_SQL
+    )
 
-    return data
+    return [
+        {
+            "name": name,
+            "category": category,
+            "current_stock": int(current_stock),
+            "reorder_point": int(reorder_point),
+            "supplier": supplier or "Unknown",
+            "days_supply": round(days_supply, 1),
+        }
+        for name, category, current_stock, reorder_point, supplier, days_supply in results
+    ]
 
 
 async def _generate_financial_report_data(
-    parameters: Dict[str, Any], cursor
+    parameters: Dict[str, Any],
 ) -> List[Dict[str, Any]]:
     """Generate financial report data"""
 
     parameters.get("includeForecasts", True)
 
     # Get monthly revenue data
-    cursor.execute("""
-        SELECT 
-            strftime('%Y-%m', created_at) as period,
-            SUM(total_amount) as revenue,
-            COUNT(*) as orders,
-            AVG(total_amount) as avg_order_value
-        FROM purchase_orders
-        WHERE created_at >= date('now', '-12 months')
-        GROUP BY strftime('%Y-%m', created_at)
-        ORDER BY period
-    """)
-
-    results = cursor.fetchall()
-
-    data = []
-    for row in results:
-        period, revenue, orders, avg_order_value = row
-
-        # Convert period to readable format
-        try:
-            period_date = datetime.strptime(period, "%Y-%m")
-            period_label = period_date.strftime("%b %Y")
-        except ValueError:
-            period_label = period
-
-        data.append(
-            {
-                "period": period_label,
-                "revenue": round(revenue or 0, 2),
-                "orders": orders or 0,
-                "avg_order_value": round(avg_order_value or 0, 2),
-            }
-        )
-
-    return data
+    results = await _fetchall(_FINANCIAL_SQL)
+
+    return [
+        {
+            "period": _format_period(period, "%b %Y"),
+            "revenue": round(revenue or 0, 2),
+            "orders": orders or 0,
+            "avg_order_value": round(avg_order_value or 0, 2),
+        }
+        for period, revenue, orders, avg_order_value in results
+    ]
 
 
 async def _generate_supplier_report_data(
-    parameters: Dict[str, Any], cursor
+    parameters: Dict[str, Any],
 ) -> List[Dict[str, Any]]:
     """Generate supplier report data"""
 
     min_order_threshold = parameters.get("minOrderThreshold", 1)
 
-    # Modified query to include suppliers even without recent orders
-    cursor.execute(
-        """
-        SELECT
-            s.name,
-            COALESCE(COUNT(po.po_id), 0) as orders,
-            COALESCE(COUNT(CASE
-                WHEN po.actual_delivery_date <= po.requested_delivery_date
-                THEN 1
-            END), 0) as on_time_orders,
-            COALESCE(AVG(CASE
-                WHEN po.actual_delivery_date > po.requested_delivery_date
-                THEN julianday(po.actual_delivery_date) - julianday(po.requested_delivery_date)
-                ELSE 0
-            END), 0) as avg_delay,
-            CASE
-                WHEN COUNT(po.po_id) = 0 THEN 4.0
-                WHEN COUNT(CASE WHEN po.actual_delivery_date <= po.requested_delivery_date THEN 1 END) * 100.0 / COUNT(po.po_id) >= 95 THEN 4.8
-                WHEN COUNT(CASE WHEN po.actual_delivery_date <= po.requested_delivery_date THEN 1 END) * 100.0 / COUNT(po.po_id) >= 90 THEN 4.5
-                WHEN COUNT(CASE WHEN po.actual_delivery_date <= po.requested_delivery_date THEN 1 END) * 100.0 / COUNT(po.po_id) >= 85 THEN 4.2
-                ELSE 4.0
-            END as rating,
-            s.avg_lead_time
-        FROM suppliers s
-        LEFT JOIN purchase_orders po ON s.supplier_id = po.supplier_id
-            AND date(po.created_at) >= date('now', '-6 months')
-        WHERE s.status = 'OK' OR s.status IS NULL
-        GROUP BY s.supplier_id, s.name, s.avg_lead_time
-        ORDER BY orders DESC, s.name ASC
-    """
-    )
-
-    results = cursor.fetchall()
-
-    data = []
-    for row in results:
-        name, orders, on_time_orders, avg_delay, rating, avg_lead_time = row
-        on_time_percentage = (
-            (on_time_orders / max(orders, 1)) * 100 if orders > 0 else 0
-        )
-
-        data.append(
-            {
-                "name": name,
-                "orders": orders,
-                "on_time": round(on_time_percentage, 1),
-                "avg_delay": round(avg_delay or 0, 1),
-                "avg_lead_time": round(avg_lead_time or 0, 1),
-                "rating": round(rating, 1),
-            }
-        )
-
-    return data
+    # Aggregate each supplier's recent orders once, then derive the rating
+    # from those totals (suppliers without recent orders are included)
+    results = await _fetchall(_SUPPLIER_SQL)
+
+    return [
+        {
+            "name": name,
+            "orders": orders,
+            "on_time": round(on_time_orders / orders * 100, 1) if orders > 0 else 0,
+            "avg_delay": round(avg_delay or 0, 1),
+            "avg_lead_time": round(avg_lead_time or 0, 1),
+            "rating": round(rating, 1),
+        }
+        for name, orders, on_time_orders, avg_delay, rating, avg_lead_time in results
+    ]
 
 
 async def _generate_consumption_report_data(
-    parameters: Dict[str, Any], cursor
+    parameters: Dict[str, Any],
 ) -> List[Dict[str, Any]]:
     """Generate consumption report data"""
 
@@ -1225,253 +1615,177 @@ async def _generate_consumption_report_data(
     else:
         start_date = end_date - timedelta(days=180)  # Default
 
-    cursor.execute(
-        """
-        SELECT 
-            strftime('%Y-%m', date) as period,
-            SUM(qty_dispensed) as consumption,
-            COUNT(DISTINCT po.po_id) as orders
-        FROM consumption_history ch
-        LEFT JOIN medications m ON ch.med_id = m.med_id
-        LEFT JOIN purchase_orders po ON m.supplier_id = po.supplier_id 
-            AND date(po.created_at) = ch.date
-        WHERE ch.date >= ? AND ch.date <= ?
-        GROUP BY strftime('%Y-%m', date)
-        ORDER BY period
-    """,
+    results = await _fetchall(
+        _CONSUMPTION_SQL,
         (start_date.isoformat(), end_date.isoformat()),
     )
 
-    results = cursor.fetchall()
-
-    data = []
-    for row in results:
-        period, consumption, orders = row
+    return [
+        {
+            "month": _format_period(period, "%b"),
+            "consumption": int(consumption or 0),
+            "orders": int(orders or 0),
+            "forecast": (
+                int(consumption * 1.05) if consumption and include_forecasts else 0
+            ),
+        }
+        for period, consumption, orders in results
+    ]
+
+
+def _compliance_rows(rows) -> List[Dict[str, Any]]:
+    """Shape expiry compliance rows for the optimization report"""
+    return [
+        {
+            "item_name": item_name,
+            "batch_number": batch_number,
+            "expiry_date": expiry_date,
+            "days_remaining": int(days_remaining) if days_remaining else 0,
+            "violation_type": status,
+            "action_required": action_required,
+        }
+        for item_name, batch_number, expiry_date, days_remaining, status, action_required in rows
+    ]
+
+
+def _placement_rows(rows) -> List[Dict[str, Any]]:
+    """Shape placement optimization rows for the optimization report"""
+    return [
+        {
+            "item_name": item_name,
+            "current_location": current_location,
+            "optimal_location": optimal_location,
+            "velocity_category": velocity_category,
+            "time_savings": round(time_savings, 1) if time_savings else 0,
+        }
+        for item_name, current_location, optimal_location, velocity_category, time_savings in rows
+    ]
+
+
+def _movement_rows(rows) -> List[Dict[str, Any]]:
+    """Shape movement pattern rows for the optimization report"""
+    return [
+        {
+            "route": route,
+            "frequency": frequency,
+            "distance": round(distance, 1) if distance else 0,
+            "avg_time": round(avg_time, 1) if avg_time else 0,
+            "optimization": optimization,
+        }
+        for route, frequency, distance, avg_time, optimization in rows
+    ]
+
+
+async def _general_optimization_rows() -> List[Dict[str, Any]]:
+    """Build the general optimization metrics from the chaos summary queries"""
+    # The three summary queries are independent, so run them concurrently
+    # on separate pooled connections
+    metrics, fragmentation, velocity_mismatches = await asyncio.gather(
+        # Get chaos metrics
+        _fetchall(_CHAOS_METRICS_SQL),
+        # Get fragmentation data
+        _fetchone(_FRAGMENTATION_SQL),
+        # Get velocity mismatches
+        _fetchone(_VELOCITY_MISMATCH_SQL),
+    )
 
-        # Convert period to readable format
-        try:
-            period_date = datetime.strptime(period, "%Y-%m")
-            period_label = period_date.strftime("%b")
-        except ValueError:
-            period_label = period
-
-        forecast = int(consumption * 1.05) if consumption and include_forecasts else 0
-
-        data.append(
-            {
-                "month": period_label,
-                "consumption": int(consumption or 0),
-                "orders": int(orders or 0),
-                "forecast": forecast,
-            }
-        )
+    data = [
+        {
+            "metric_name": metric_name,
+            "current_score": round(current, 2) if current else 0,
+            "target_score": optimal if optimal else 0,
+            "improvement_potential": round(potential, 2) if potential else 0,
+            "priority": "High" if potential and potential > 10 else "Medium",
+        }
+        for metric_name, current, optimal, potential in metrics
+    ]
+
+    # Add summary metrics
+    if fragmentation:
+        data.append({
+            "metric_name": "Batch Fragmentation",
+            "current_score": fragmentation[0] if fragmentation[0] else 0,
+            "target_score": 0,
+            "improvement_potential": fragmentation[0] * 5 if fragmentation[0] else 0,
+            "priority": "High"
+        })
+
+    if velocity_mismatches:
+        data.append({
+            "metric_name": "Velocity Mismatches",
+            "current_score": velocity_mismatches[0] if velocity_mismatches[0] else 0,
+            "target_score": 0,
+            "improvement_potential": velocity_mismatches[0] * 3 if velocity_mismatches[0] else 0,
+            "priority": "High"
+        })
 
     return data
 
 
+# Focus-specific optimization queries and the adapters that shape their rows
+_FOCUS_QUERIES = {
+    "compliance": _COMPLIANCE_SQL,
+    "placement": _PLACEMENT_SQL,
+    "movement": _MOVEMENT_SQL,
+}
+_FOCUS_ADAPTERS = {
+    "compliance": _compliance_rows,
+    "placement": _placement_rows,
+    "movement": _movement_rows,
+}
+
+
 async def _generate_warehouse_optimization_report_data(
-    parameters: Dict[str, Any], cursor
+    parameters: Dict[str, Any],
 ) -> List[Dict[str, Any]]:
     """Generate warehouse optimization report data"""
 
-    analysis_type = parameters.get("analysis_type", "full")
     focus = parameters.get("focus", "general")
 
-    # Get chaos metrics
-    cursor.execute("""
-        SELECT
-            metric_name,
-            current_chaos_score,
-            optimal_score,
-            improvement_potential
-        FROM warehouse_chaos_metrics
-        ORDER BY improvement_potential DESC
-    """)
-
-    metrics = cursor.fetchall()
-
-    # Get fragmentation data
-    cursor.execute("""
-        SELECT
-            COUNT(DISTINCT b.batch_id) as fragmented_batches,
-            COUNT(DISTINCT mp.position_id) as total_positions,
-            SUM(mp.quantity) as total_quantity
-        FROM medication_placements mp
-        JOIN batch_info b ON mp.batch_id = b.batch_id
-        WHERE mp.is_active = 1
-        GROUP BY b.batch_id
-        HAVING COUNT(DISTINCT mp.position_id) > 1
-    """)
-
-    fragmentation = cursor.fetchone()
-
-    # Get velocity mismatches
-    cursor.execute("""
-        SELECT COUNT(*) as mismatches
-        FROM medication_placements mp
-        JOIN medications m ON mp.med_id = m.med_id
-        JOIN medication_attributes ma ON m.med_id = ma.med_id
-        JOIN shelf_positions sp ON mp.position_id = sp.position_id
-        WHERE mp.is_active = 1
-        AND ((ma.movement_category = 'Fast' AND sp.grid_y = 3)
-            OR (ma.movement_category = 'Slow' AND sp.grid_y = 1))
-    """)
-
-    velocity_mismatches = cursor.fetchone()
-
-    # Build report data based on focus
-    data = []
-
-    if focus == "compliance":
-        # Focus on compliance metrics
-        cursor.execute("""
-            SELECT
-                m.name as item_name,
-                b.lot_number as batch_number,
-                b.expiry_date,
-                julianday(b.expiry_date) - julianday('now') as days_remaining,
-                CASE
-                    WHEN julianday(b.expiry_date) - julianday('now') <= 0 THEN 'Expired'
-                    WHEN julianday(b.expiry_date) - julianday('now') <= 7 THEN 'Critical'
-                    WHEN julianday(b.expiry_date) - julianday('now') <= 30 THEN 'Warning'
-                    ELSE 'OK'
-                END as status,
-                'Immediate rotation required' as action_required
-            FROM medication_placements mp
-            JOIN batch_info b ON mp.batch_id = b.batch_id
-            JOIN medications m ON mp.med_id = m.med_id
-            WHERE mp.is_active = 1
-            AND julianday(b.expiry_date) - julianday('now') <= 30
-            ORDER BY days_remaining
-            LIMIT 50
-        """)
-
-        for row in cursor.fetchall():
-            data.append({
-                "item_name": row[0],
-                "batch_number": row[1],
-                "expiry_date": row[2],
-                "days_remaining": int(row[3]) if row[3] else 0,
-                "violation_type": row[4],
-                "action_required": row[5]
-            })
-
-    elif focus == "placement":
-        # Focus on placement optimization
-        cursor.execute("""
-            SELECT
-                m.name as item_name,
-                a.aisle_code || '-' || s.shelf_code || '-' || sp.grid_label as current_location,
-                CASE ma.movement_category
-                    WHEN 'Fast' THEN 'A1-S1-P1'
-                    WHEN 'Medium' THEN 'B1-S1-P5'
-                    ELSE 'C1-S2-P8'
-                END as optimal_location,
-                ma.movement_category as velocity_category,
-                ma.velocity_score * 2.5 as time_savings
-            FROM medication_placements mp
-            JOIN medications m ON mp.med_id = m.med_id
-            JOIN medication_attributes ma ON m.med_id = ma.med_id
-            JOIN shelf_positions sp ON mp.position_id = sp.position_id
-            JOIN warehouse_shelves s ON sp.shelf_id = s.shelf_id
-            JOIN warehouse_aisles a ON s.aisle_id = a.aisle_id
-            WHERE mp.is_active = 1
-            AND ((ma.movement_category = 'Fast' AND sp.grid_y = 3)
-                OR (ma.movement_category = 'Slow' AND sp.grid_y = 1))
-            LIMIT 50
-        """)
-
-        for row in cursor.fetchall():
-            data.append({
-                "item_name": row[0],
-                "current_location": row[1],
-                "optimal_location": row[2],
-                "velocity_category": row[3],
-                "time_savings": round(row[4], 1) if row[4] else 0
-            })
-
-    elif focus == "movement":
-        # Focus on movement patterns
-        cursor.execute("""
-            SELECT
-                movement_type || ' - ' || COALESCE(a.aisle_code || '-' || s.shelf_code, 'Unknown') as route,
-                COUNT(*) as frequency,
-                ROUND(AVG(sp.grid_x * 3 + sp.grid_y * 2), 1) as distance,
-                COUNT(*) * 15 as avg_time,
-                'Optimize path' as optimization
-            FROM movement_history mh
-            LEFT JOIN shelf_positions sp ON mh.position_id = sp.position_id
-            LEFT JOIN warehouse_shelves s ON sp.shelf_id = s.shelf_id
-            LEFT JOIN warehouse_aisles a ON s.aisle_id = a.aisle_id
-            WHERE mh.movement_date >= datetime('now', '-30 days')
-            GROUP BY movement_type, a.aisle_code, s.shelf_code
-            HAVING COUNT(*) > 5
-            ORDER BY frequency DESC
-            LIMIT 50
-        """)
-
-        for row in cursor.fetchall():
-            data.append({
-                "route": row[0],
-                "frequency": row[1],
-                "distance": round(row[2], 1) if row[2] else 0,
-                "avg_time": round(row[3], 1) if row[3] else 0,
-                "optimization": row[4]
-            })
-
+    if focus == "all":
+        # Focus queries are read-only and independent, so run them concurrently
+        # on separate pooled connections and tag each row with its focus
+        results = await asyncio.gather(
+            *(_fetchall(query) for query in _FOCUS_QUERIES.values())
+        )
+        data = [
+            {"focus": name, **row}
+            for name, rows in zip(_FOCUS_QUERIES, results)
+            for row in _FOCUS_ADAPTERS[name](rows)
+        ]
+    elif focus in _FOCUS_QUERIES:
+        data = _FOCUS_ADAPTERS[focus](await _fetchall(_FOCUS_QUERIES[focus]))
     else:
-        # General optimization metrics
-        for metric in metrics:
-            data.append({
-                "metric_name": metric[0],
-                "current_score": round(metric[1], 2) if metric[1] else 0,
-                "target_score": metric[2] if metric[2] else 0,
-                "improvement_potential": round(metric[3], 2) if metric[3] else 0,
-                "priority": "High" if metric[3] and metric[3] > 10 else "Medium"
-            })
-
-        # Add summary metrics
-        if fragmentation:
-            data.append({
-                "metric_name": "Batch Fragmentation",
-                "current_score": fragmentation[0] if fragmentation[0] else 0,
-                "target_score": 0,
-                "improvement_potential": fragmentation[0] * 5 if fragmentation[0] else 0,
-                "priority": "High"
-            })
-
-        if velocity_mismatches:
-            data.append({
-                "metric_name": "Velocity Mismatches",
-                "current_score": velocity_mismatches[0] if velocity_mismatches[0] else 0,
-                "target_score": 0,
-                "improvement_potential": velocity_mismatches[0] * 3 if velocity_mismatches[0] else 0,
-                "priority": "High"
-            })
+        data = await _general_optimization_rows()
 
     return data if data else [{"message": "No optimization data available"}]
 
 
-def _export_csv(report_result: Dict[str, Any]) -> StreamingResponse:
-    """Export report data as CSV"""
-
+def _csv_stream(rows: List[Dict[str, Any]], batch_size: int = 2000):
+    """Yield UTF-8 encoded CSV in row batches, reusing a single buffer"""
     output = io.StringIO()
 
-    if not report_result["data"]:
-        writer = csv.writer(output)
-        writer.writerow(["No data available"])
-    else:
-        # Get field names from first row
-        fieldnames = list(report_result["data"][0].keys())
+    if not rows:
+        csv.writer(output).writerow(["No data available"])
+        yield output.getvalue().encode()
+        return
 
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(report_result["data"])
+    # Rows can differ in shape (e.g. focus="all"), so take every key in order
+    fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer.writeheader()
 
-    output.seek(0)
+    for start in range(0, len(rows), batch_size):
+        writer.writerows(rows[start : start + batch_size])
+        yield output.getvalue().encode()
+        output.seek(0)
+        output.truncate()
 
+
+def _export_csv(report_result: Dict[str, Any]) -> StreamingResponse:
+    """Export report data as CSV"""
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode()),
+        _csv_stream(report_result["data"]),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=report.csv"},
     )
@@ -2,32 +2,57 @@
 API routes for inventory management
 """
 
+import asyncio
+import hashlib
+import itertools
 import os
+import queue
+import re
+import secrets
 import smtplib
 import ssl
-import sys
+from collections import defaultdict
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Any, Dict, List, Optional
-from uuid import uuid4
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+import orjson
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from loguru import logger
+from pydantic import BaseModel, ConfigDict
 
-# Add parent directory to path to import data_loader
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ai_agents.api_handler import AIPoHandler
+from ai_agents.config import get_config
 from data_loader import DataLoader
+from services.inventory_batcher import InventoryBatcher
+from services.request_coalescer import RequestCoalescer
+from utils.cache_manager import CacheManager
 
 # Initialize router
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Global data loader instance
 data_loader = DataLoader()
 
-# Initialize AI PO handler
-ai_po_handler = AIPoHandler(data_loader)
+# Concurrent inventory requests with the same filters share one build
+inventory_batcher = InventoryBatcher(data_loader)
+
+# Per-medication detail and price lookups are cached briefly and coalesced
+medication_lookups = RequestCoalescer(ttl_seconds=30)
+
+# AI PO handler, created by init_ai_po_handler() once data is loaded
+ai_po_handler: Optional[AIPoHandler] = None
+
+
+def init_ai_po_handler() -> AIPoHandler:
+    """Create the AI PO handler; called from the app lifespan after data loads"""
+    global ai_po_handler
+    ai_po_handler = AIPoHandler(data_loader)
+    return ai_po_handler
+
 
 # Logger for email flow - using loguru with context
 email_logger = logger.bind(name="email")
@@ -35,91 +60,102 @@ email_logger = logger.bind(name="email")
 # Purchase orders are now stored in the database via data_loader
 
 
-@router.get("/inventory")
+# Pydantic models for request payloads
+class POAllocation(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    supplier_id: int
+    quantity: int = 0
+    unit_price: float = 0
+
+
+class POItem(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    med_id: int
+    allocations: List[POAllocation] = []
+
+
+class POCreatePayload(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    items: List[POItem] = []
+    meta: Dict[str, Any] = {}
+    send_emails: bool = False
+
+
+class AIPOCreatePayload(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    ai_result: Dict[str, Any] = {}
+    meta: Dict[str, Any] = {}
+
+
+# Serialized filter and supplier responses; the data changes only on reload
+LOOKUP_CACHE_SECONDS = 60
+lookup_cache = CacheManager(default_ttl_seconds=LOOKUP_CACHE_SECONDS)
+
+
+@router.get("/inventory", response_model=None)
 async def get_inventory(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     search: Optional[str] = Query("", description="Search term"),
     category: Optional[str] = Query("", description="Category filter"),
     supplier: Optional[str] = Query("", description="Supplier filter"),
     stock_level: Optional[str] = Query("", description="Stock level filter"),
+    cursor: Optional[int] = Query(
+        None, description="Resume after this med_id (next_cursor); overrides page"
+    ),
 ):
-    """Get paginated inventory data with filters"""
-    try:
-        result = data_loader.get_inventory_data(
-            page=page,
-            page_size=page_size,
-            search=search,
-            category=category,
-            supplier=supplier,
-            stock_level=stock_level,
-        )
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """Get paginated inventory data with filters; 304 if the page is unchanged"""
+    result = await inventory_batcher.get_page(
+        page=page,
+        page_size=page_size,
+        search=search,
+        category=category,
+        supplier=supplier,
+        stock_level=stock_level,
+        cursor=cursor,
+    )
+    return _etag_json_response(request, result)
 
 
 @router.get("/medication/{med_id}")
 async def get_medication_details(med_id: int):
     """Get detailed information for a specific medication"""
-    try:
-        details = data_loader.get_medication_details(med_id)
-        if not details:
-            raise HTTPException(status_code=404, detail="Medication not found")
-        return details
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    details = await medication_lookups.get(
+        "medication_details", med_id, data_loader.get_medication_details, med_id
+    )
+    if not details:
+        raise HTTPException(status_code=404, detail="Medication not found")
+    return details
 
 
 @router.get("/filters")
-async def get_filter_options():
+async def get_filter_options(request: Request):
     """Get available filter options"""
-    try:
-        return data_loader.get_filter_options()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _cached_lookup_response(
+        request, "filters", data_loader.get_filter_options
+    )
 
 
 @router.get("/dashboard/stats")
-async def get_dashboard_stats():
+async def get_dashboard_stats(request: Request):
     """Get dashboard statistics"""
-    try:
-        # Get inventory data using the same method as the inventory endpoint
-        inventory_data = data_loader.get_inventory_data(page_size=100)
-        medications = inventory_data["items"]
-
-        # Calculate statistics
-        total_medications = len(medications)
-
-        low_stock_count = sum(
-            1 for med in medications if med["current_stock"] <= med["reorder_point"]
-        )
-
-        critical_stock_count = sum(
-            1
-            for med in medications
-            if med["current_stock"] <= med["reorder_point"] * 0.5
-        )
-
-        total_value = sum(
-            med["current_stock"] * med.get("current_price", 0) for med in medications
-        )
+    return await _cached_lookup_response(
+        request, "dashboard_stats", _build_dashboard_stats
+    )
 
-        # For orders_today, we'll return 0 for now since PO tracking is not implemented
-        orders_today = 0
 
-        return {
-            "total_medications": total_medications,
-            "low_stock_count": low_stock_count,
-            "critical_stock_count": critical_stock_count,
-            "total_value": total_value,
-            "orders_today": orders_today,
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+def _build_dashboard_stats() -> Dict[str, Any]:
+    """Inventory totals; they change only when the data is reloaded"""
+    # For orders_today, we'll return 0 for now since PO tracking is not implemented
+    return {**data_loader.get_inventory_stats(), "orders_today": 0}
 
 
-@router.get("/medication/{med_id}/consumption-history")
+@router.get("/medication/{med_id}/consumption-history", response_model=None)
 async def get_medication_consumption_history(
     med_id: int,
     days: int = Query(
@@ -127,230 +163,329 @@ async def get_medication_consumption_history(
     ),
 ):
     """Get historical consumption data and forecast for a specific medication"""
-    try:
-        result = data_loader.get_medication_consumption_history(med_id, days)
-        if "error" in result:
-            raise HTTPException(status_code=404, detail=result["error"])
-        return result
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await asyncio.to_thread(
+        data_loader.get_medication_consumption_history, med_id, days
+    )
 
 
 @router.get("/suppliers")
-async def list_suppliers():
-    try:
-        suppliers = data_loader.get_suppliers()
-        # Ensure contact fields are present if available in DB
-        for s in suppliers:
-            supplier_id = s.get("supplier_id")
-            src = data_loader.suppliers.get(supplier_id, {})
-            for key in ("email", "contact_name", "phone", "address"):
-                if key in src and key not in s:
-                    s[key] = src.get(key)
-        return {"suppliers": suppliers}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def list_suppliers(request: Request):
+    return await _cached_lookup_response(request, "suppliers", _build_supplier_list)
+
+
+def _build_supplier_list() -> Dict[str, Any]:
+    """Supplier list; rows already carry every supplier column, contacts included"""
+    return {"suppliers": data_loader.get_suppliers()}
+
+
+def _encode_lookup(build) -> Tuple[bytes, str]:
+    """Build and serialize a lookup body, paired with its ETag"""
+    content = orjson.dumps(build(), default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return content, f'"{hashlib.md5(content).hexdigest()}"'
+
+
+async def _cached_lookup_response(request: Request, cache_key: str, build) -> Response:
+    """Serve a lookup body from the TTL cache with an ETag, or 304 if unchanged"""
+    entry = lookup_cache.get(cache_key)
+    if entry is None:
+        # A miss walks the loaded data; keep that off the event loop
+        entry = await asyncio.to_thread(_encode_lookup, build)
+        lookup_cache.set(cache_key, entry)
+
+    content, etag = entry
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={LOOKUP_CACHE_SECONDS}",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type="application/json", headers=headers)
+
+
+def _etag_json_response(request: Request, payload: Any) -> Response:
+    """Serialize payload with an ETag of its bytes, or 304 if the client has it"""
+    content = orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    etag = f'"{hashlib.md5(content).hexdigest()}"'
+    # no-cache: clients may store the body but must revalidate every time
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type="application/json", headers=headers)
 
 
 @router.get("/purchase-orders")
-async def list_purchase_orders():
+async def list_purchase_orders(request: Request):
+    # The body is streamed, so its ETag comes from a cheap table version
+    # rather than from hashing the rows
+    version = await asyncio.to_thread(data_loader.purchase_orders_version)
+    etag = f'"{hashlib.md5(version.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    # Run the query and fetch the first batch before streaming, so
+    # database errors still surface as a 500
+    batches = data_loader.iter_purchase_order_summaries()
+    first_batch = await asyncio.to_thread(next, batches, b"")
+    return StreamingResponse(
+        _stream_purchase_orders(first_batch, batches),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def _stream_purchase_orders(first_batch: bytes, batches):
+    """Wrap the JSON-encoded PO summary batches into one document, one per chunk"""
     try:
-        # Get POs from database
-        all_pos = data_loader.list_purchase_orders()
-        return {
-            "purchase_orders": [
-                {
-                    "po_id": po["po_id"],
-                    "po_number": po.get("po_number", po["po_id"]),
-                    "supplier_id": po["supplier_id"],
-                    "supplier_name": po["supplier_name"],
-                    "status": po["status"],
-                    "created_at": po["created_at"],
-                    "expected_delivery_date": po.get("expected_delivery_date"),
-                    "total_lines": po.get("item_count", 0),
-                    "total_amount": po.get("total_amount", 0),
-                }
-                for po in all_pos
-            ]
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        yield b'{"purchase_orders":['
+        separator = b""
+        for chunk in itertools.chain([first_batch], batches):
+            if not chunk:
+                continue
+            yield separator + chunk
+            separator = b","
+        yield b"]}"
+    finally:
+        # Return the pooled connection now if the client disconnected mid-stream
+        batches.close()
 
 
 @router.get("/purchase-orders/{po_id}")
 async def get_purchase_order(po_id: str):
-    try:
-        po = data_loader.get_purchase_order(po_id)
-        if not po:
-            raise HTTPException(status_code=404, detail="PO not found")
-        return po
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    po = await asyncio.to_thread(data_loader.get_purchase_order, po_id)
+    if not po:
+        raise HTTPException(status_code=404, detail="PO not found")
+    return po
 
 
 @router.post("/purchase-orders")
-async def create_purchase_orders(payload: dict):
-    try:
-        # Payload contract: {
-        #   items: [{ med_id, total_quantity, allocations: [{ supplier_id, quantity, unit_price }] }],
-        #   meta: { requested_delivery_date, notes, buyer },
-        #   send_emails: boolean (optional, default: false)
-        # }
-        items = payload.get("items", [])
-        meta = payload.get("meta", {})
-        send_emails = payload.get("send_emails", False)
-
-        # Group allocations by supplier to create 1 PO per supplier
-        supplier_to_lines = {}
-        for item in items:
-            med_id = int(item.get("med_id"))
-            med_info = data_loader.medications.get(med_id, {})
-            med_name = med_info.get("name", f"Medication {med_id}")
-            pack_size = med_info.get("pack_size", 1)
-            for alloc in item.get("allocations", []):
-                supplier_id = int(alloc.get("supplier_id"))
-                quantity = int(alloc.get("quantity", 0))
-                unit_price = float(alloc.get("unit_price", 0))
-                if quantity <= 0:
-                    continue
-                line = {
+async def create_purchase_orders(
+    payload: POCreatePayload, background_tasks: BackgroundTasks
+):
+    # Fields are already coerced by POCreatePayload
+    items = payload.items
+    meta = payload.meta
+    send_emails = payload.send_emails
+
+    # Group allocations by supplier to create 1 PO per supplier
+    supplier_to_lines, supplier_totals = _group_allocations(items)
+    suppliers = data_loader.get_suppliers_bulk(supplier_to_lines)
+
+    created_pos = []
+    now = datetime.utcnow()
+    now_iso = now.isoformat() + "Z"
+    today = now.strftime("%Y%m%d")
+
+    # PO numbers come from an atomic per-year counter, one block per request
+    year = now.year
+    first_sequence = await asyncio.to_thread(
+        data_loader.next_po_number, year, len(supplier_to_lines)
+    )
+
+    for po_sequence, (supplier_id, lines) in enumerate(
+        supplier_to_lines.items(), start=first_sequence
+    ):
+        supplier = suppliers.get(supplier_id, {})
+        po_id = f"PO-{today}-{secrets.token_hex(4).upper()}"
+        po_number = f"PO-{year}-{po_sequence:05d}"
+
+        created_pos.append(
+            _build_po_record(
+                po_id,
+                po_number,
+                supplier_id,
+                supplier.get("name", f"Supplier {supplier_id}"),
+                supplier_totals[supplier_id],
+                lines,
+                now_iso,
+                meta,
+                notes=meta.get("notes"),
+                created_by=meta.get("buyer", "system"),
+            )
+        )
+
+    # Save before responding so the returned IDs are immediately readable
+    await asyncio.to_thread(data_loader.save_purchase_orders, created_pos)
+    _invalidate_medication_details(created_pos)
+
+    # Send emails to suppliers in the background if requested
+    if send_emails and supplier_to_lines:
+        background_tasks.add_task(
+            _email_suppliers, supplier_to_lines, supplier_totals, meta, "PO creation"
+        )
+
+    # Return format expected by frontend (with 'id' field)
+    if len(created_pos) == 1:
+        # Single PO - return as expected by frontend
+        return {
+            "id": created_pos[0]["po_id"],
+            "created": [po["po_id"] for po in created_pos],
+        }
+    else:
+        # Multiple POs - return first one's ID for toast, but keep all IDs
+        return {
+            "id": created_pos[0]["po_id"],
+            "created": [po["po_id"] for po in created_pos],
+        }
+
+
+def _group_allocations(
+    items: List[POItem],
+) -> Tuple[Dict[int, List[Dict[str, Any]]], Dict[int, float]]:
+    """Group positive allocations into PO lines per supplier, with supplier totals"""
+    # Fetch every referenced medication once up front
+    medications = data_loader.get_medications_bulk({item.med_id for item in items})
+
+    supplier_to_lines: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    supplier_totals: Dict[int, float] = defaultdict(float)
+    for item in items:
+        med_id = item.med_id
+        med_info = medications.get(med_id, {})
+        med_name = med_info.get("name", f"Medication {med_id}")
+        pack_size = med_info.get("pack_size", 1)
+        for alloc in item.allocations:
+            supplier_id = alloc.supplier_id
+            quantity = alloc.quantity
+            unit_price = alloc.unit_price
+            if quantity <= 0:
+                continue
+            total_price = quantity * unit_price
+            supplier_to_lines[supplier_id].append(
+                {
                     "med_id": med_id,
                     "med_name": med_name,
                     "quantity": quantity,
                     "pack_size": pack_size,
                     "unit_price": unit_price,
-                    "total_price": quantity * unit_price,
+                    "total_price": total_price,
                 }
-                supplier_to_lines.setdefault(supplier_id, []).append(line)
-
-        created_pos = []
-        now_iso = datetime.utcnow().isoformat() + "Z"
-
-        # Generate unique PO number
-        year = datetime.utcnow().year
-        po_counter = len(data_loader.list_purchase_orders()) + 1
-
-        for supplier_id, lines in supplier_to_lines.items():
-            supplier = data_loader.suppliers.get(supplier_id, {})
-            po_id = (
-                f"PO-{datetime.utcnow().strftime('%Y%m%d')}-{str(uuid4())[:8].upper()}"
             )
-            po_number = f"PO-{year}-{po_counter:05d}"
-
-            total_amount = sum(line["total_price"] for line in lines)
-
-            po_data = {
-                "po_id": po_id,
-                "po_number": po_number,
-                "supplier_id": supplier_id,
-                "supplier_name": supplier.get("name", f"Supplier {supplier_id}"),
-                "status": "draft",
-                "total_amount": total_amount,
-                "created_at": now_iso,
-                "updated_at": now_iso,
-                "requested_delivery_date": meta.get("requested_delivery_date"),
-                "notes": meta.get("notes"),
-                "created_by": meta.get("buyer", "system"),
-                "items": lines,
-            }
-
-            # Save to database
-            data_loader.save_purchase_order(po_data)
-            created_pos.append(po_data)
-            po_counter += 1
-
-        # Send emails to suppliers if requested
-        if send_emails and supplier_to_lines:
-            fallback_to = os.getenv("SUPPLIER_FALLBACK_EMAIL")
-            bcc = os.getenv("EMAIL_BCC")
-            email_logger.info(
-                f"PO creation email flow start | suppliers={len(supplier_to_lines)}"
-            )
-
-            for supplier_id, lines in supplier_to_lines.items():
-                supplier = data_loader.suppliers.get(supplier_id, {})
-                supplier_name = supplier.get("name", f"Supplier {supplier_id}")
-                to_email = (
-                    supplier.get("email")
-                    or fallback_to
-                    or f"{_slugify(supplier_name)}@example.com"
-                )
-                subject = f"Purchase Order Request - {supplier_name}"
-                email_logger.info(
-                    f"PO creation email: composing | supplier_id={supplier_id} | supplier={supplier_name} | to={to_email} | lines={len(lines)}"
-                )
-                html_body = _render_supplier_email_html(supplier_name, lines, meta)
-                _send_email_via_smtp(subject, html_body, to_email, bcc=bcc)
-
-            email_logger.info(
-                f"PO creation email flow success | suppliers_notified={len(supplier_to_lines)}"
-            )
-
-        # Return format expected by frontend (with 'id' field)
-        if len(created_pos) == 1:
-            # Single PO - return as expected by frontend
-            return {
-                "id": created_pos[0]["po_id"],
-                "created": [po["po_id"] for po in created_pos],
-            }
-        else:
-            # Multiple POs - return first one's ID for toast, but keep all IDs
-            return {
-                "id": created_pos[0]["po_id"],
-                "created": [po["po_id"] for po in created_pos],
-            }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+            supplier_totals[supplier_id] += total_price
+    return supplier_to_lines, supplier_totals
+
+
+def _compose_supplier_messages(
+    supplier_to_lines: Dict[int, List[Dict[str, Any]]],
+    supplier_totals: Dict[int, float],
+    suppliers: Dict[int, Dict[str, Any]],
+    meta: Dict[str, Any],
+    flow: str,
+) -> List[Tuple[str, str, str]]:
+    """Render one (subject, html_body, to_email) message per grouped supplier"""
+    fallback_to = _smtp_settings()["fallback_to"]
+    messages = []
+    for supplier_id, lines in supplier_to_lines.items():
+        supplier = suppliers.get(supplier_id, {})
+        supplier_name = supplier.get("name", f"Supplier {supplier_id}")
+        to_email = (
+            supplier.get("email")
+            or fallback_to
+            or f"{_slugify(supplier_name)}@example.com"
+        )
+        subject = f"Purchase Order Request - {supplier_name}"
+        email_logger.info(
+            f"{flow} email: composing | supplier_id={supplier_id} | supplier={supplier_name} | to={to_email} | lines={len(lines)}"
+        )
+        html_body = _render_supplier_email_html(
+            supplier_name, lines, meta, supplier_totals[supplier_id]
+        )
+        messages.append((subject, html_body, to_email))
+    return messages
+
+
+async def _email_suppliers(
+    supplier_to_lines: Dict[int, List[Dict[str, Any]]],
+    supplier_totals: Dict[int, float],
+    meta: Dict[str, Any],
+    flow: str,
+) -> None:
+    """Compose and send one email per grouped supplier; runs as a background task"""
+    email_logger.info(f"{flow} email flow start | suppliers={len(supplier_to_lines)}")
+    suppliers = data_loader.get_suppliers_bulk(supplier_to_lines)
+    messages = _compose_supplier_messages(
+        supplier_to_lines, supplier_totals, suppliers, meta, flow
+    )
+    # Same concurrent SMTP path as the AI-create flow
+    await _send_emails_in_background(messages, _smtp_settings()["bcc"], flow)
+
+
+def _invalidate_medication_details(created_pos: List[Dict[str, Any]]) -> None:
+    """Drop cached details of the medications on saved POs so PO history is fresh"""
+    med_ids = {int(item["med_id"]) for po in created_pos for item in po["items"]}
+    for med_id in med_ids:
+        medication_lookups.invalidate("medication_details", med_id)
+
+
+def _build_po_record(
+    po_id: str,
+    po_number: str,
+    supplier_id: int,
+    supplier_name: str,
+    total_amount: float,
+    items: List[Dict[str, Any]],
+    now_iso: str,
+    meta: Dict[str, Any],
+    notes: Optional[str],
+    created_by: str,
+) -> Dict[str, Any]:
+    """Build a draft PO record in the shape save_purchase_orders expects"""
+    return {
+        "po_id": po_id,
+        "po_number": po_number,
+        "supplier_id": supplier_id,
+        "supplier_name": supplier_name,
+        "status": "draft",
+        "total_amount": total_amount,
+        "created_at": now_iso,
+        "updated_at": now_iso,
+        "requested_delivery_date": meta.get("requested_delivery_date"),
+        "notes": notes,
+        "created_by": created_by,
+        "items": items,
+    }
 
 
 @router.get("/medications/{med_id}/supplier-prices")
 async def get_med_supplier_prices(med_id: int):
-    try:
-        med = data_loader.medications.get(med_id)
-        if not med:
-            raise HTTPException(status_code=404, detail="Medication not found")
-
-        # Get supplier prices with details from database
-        result = data_loader.get_medication_supplier_prices(med_id)
-        return result
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    med = data_loader.medications.get(med_id)
+    if not med:
+        raise HTTPException(status_code=404, detail="Medication not found")
+
+    # Get supplier prices with details from database
+    result = await medication_lookups.get(
+        "supplier_prices",
+        med_id,
+        data_loader.get_medication_supplier_prices,
+        med_id,
+    )
+    return result
 
 
 # ============ Email Utilities ============
 
 
-def _slugify(name: str) -> str:
-    return "".join(ch.lower() if ch.isalnum() else "" for ch in name) or "supplier"
+# Deletes every ASCII character that is not a letter or digit
+_SLUG_DELETE = str.maketrans(
+    "", "", "".join(chr(c) for c in range(128) if not chr(c).isalnum())
+)
 
 
-def _render_supplier_email_html(
-    supplier_name: str, po_lines: List[Dict[str, Any]], meta: Dict[str, Any]
-) -> str:
-    total = sum(line["unit_price"] * line["quantity"] for line in po_lines)
-    requested = meta.get("requested_delivery_date") or "-"
-    buyer = meta.get("buyer") or "-"
-    notes = meta.get("notes") or "-"
+# Same characters for any Unicode text: \W plus "_" is exactly not isalnum()
+_SLUG_STRIP = re.compile(r"[\W_]+")
+
+
+def _slugify(name: str) -> str:
+    if name.isascii():
+        slug = name.translate(_SLUG_DELETE).lower()
+    else:
+        # Lower per character like the original: str.lower() on the whole
+        # string applies context rules such as Greek final sigma
+        slug = "".join([ch.lower() for ch in _SLUG_STRIP.sub("", name)])
+    return slug or "supplier"
 
-    rows = "".join(
-        f"""
-        <tr>
-            <td class='cell'>{line["med_name"]}</td>
-            <td class='cell right'>{line["quantity"]}</td>
-            <td class='cell right'>${line["unit_price"]:.2f}</td>
-            <td class='cell right'>${line["total_price"]:.2f}</td>
-        </tr>
-        """
-        for line in po_lines
-    )
 
-    return f"""
+# Static head of the supplier email; plain string, so the CSS is never reformatted
+_EMAIL_HEAD = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -358,33 +493,35 @@ def _render_supplier_email_html(
 <meta name='viewport' content='width=device-width, initial-scale=1.0'>
 <title>Purchase Order Request</title>
 <style>
-  :root {{ --bg:#f5f7fb; --card:#ffffff; --ink:#0f172a; --muted:#64748b; --accent:#2563eb; --soft:#eef2ff; }}
-  body {{ margin:0; padding:24px; background:var(--bg); color:var(--ink); font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Inter,Helvetica,Arial,sans-serif; }}
-  .wrap {{ max-width:760px; margin:0 auto; }}
-  .card {{ background:var(--card); border-radius:12px; border:1px solid #e5e7eb; overflow:hidden; }}
+  :root { --bg:#f5f7fb; --card:#ffffff; --ink:#0f172a; --muted:#64748b; --accent:#2563eb; --soft:#eef2ff; }
+  body { margin:0; padding:24px; background:var(--bg); color:var(--ink); font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Inter,Helvetica,Arial,sans-serif; }
+  .wrap { max-width:760px; margin:0 auto; }
+  .card { background:var(--card); border-radius:12px; border:1px solid #e5e7eb; overflow:hidden; }
   /* High-contrast header */
-  .header {{ background:#0f172a; color:#ffffff; padding:20px 24px; }}
-  .title {{ margin:0; font-size:20px; font-weight:800; letter-spacing:.2px; }}
-  .subtitle {{ margin:6px 0 0 0; font-size:13px; color:#cbd5e1; }}
-  .content {{ padding:20px 24px; }}
-  .meta-grid {{ display:grid; grid-template-columns:1fr 1fr; gap:12px; margin-bottom:12px; }}
-  .meta {{ background:var(--soft); border:1px solid #e2e8f0; border-radius:8px; padding:10px 12px; }}
-  .label {{ font-size:11px; color:var(--muted); text-transform:uppercase; letter-spacing:.5px; }}
-  .value {{ font-size:14px; font-weight:700; color:var(--ink); margin-top:3px; }}
-  table {{ width:100%; border-collapse:separate; border-spacing:0; margin-top:6px; }}
-  thead th {{ background: #eef2ff; color:#334155; border-top:1px solid #e5e7eb; border-bottom:1px solid #e5e7eb; font-size:12px; text-transform:uppercase; letter-spacing:.5px; padding:10px 12px; text-align:left; }}
-  tbody tr:nth-child(odd) td {{ background:#fafafa; }}
-  .cell {{ padding:10px 12px; border-bottom:1px solid #e9ecef; font-size:14px; color:#0f172a; }}
-  .right {{ text-align:right; }}
-  tfoot td {{ padding:12px; font-weight:800; }}
-  .totals {{ display:flex; justify-content:flex-end; gap:16px; align-items:center; padding-top:8px; }}
-  .totals-label {{ color:#334155; font-weight:700; }}
-  .totals-amount {{ background: #eef2ff; color:#1e40af; border:1px solid #dbeafe; padding:8px 12px; border-radius:8px; font-weight:800; }}
-  .footer {{ padding:14px 24px; background:#f8fafc; border-top:1px solid #e5e7eb; color:#64748b; font-size:12px; }}
+  .header { background:#0f172a; color:#ffffff; padding:20px 24px; }
+  .title { margin:0; font-size:20px; font-weight:800; letter-spacing:.2px; }
+  .subtitle { margin:6px 0 0 0; font-size:13px; color:#cbd5e1; }
+  .content { padding:20px 24px; }
+  .meta-grid { display:grid; grid-template-columns:1fr 1fr; gap:12px; margin-bottom:12px; }
+  .meta { background:var(--soft); border:1px solid #e2e8f0; border-radius:8px; padding:10px 12px; }
+  .label { font-size:11px; color:var(--muted); text-transform:uppercase; letter-spacing:.5px; }
+  .value { font-size:14px; font-weight:700; color:var(--ink); margin-top:3px; }
+  table { width:100%; border-collapse:separate; border-spacing:0; margin-top:6px; }
+  thead th { background: #eef2ff; color:#334155; border-top:1px solid #e5e7eb; border-bottom:1px solid #e5e7eb; font-size:12px; text-transform:uppercase; letter-spacing:.5px; padding:10px 12px; text-align:left; }
+  tbody tr:nth-child(odd) td { background:#fafafa; }
+  .cell { padding:10px 12px; border-bottom:1px solid #e9ecef; font-size:14px; color:#0f172a; }
+  .right { text-align:right; }
+  tfoot td { padding:12px; font-weight:800; }
+  .totals { display:flex; justify-content:flex-end; gap:16px; align-items:center; padding-top:8px; }
+  .totals-label { color:#334155; font-weight:700; }
+  .totals-amount { background: #eef2ff; color:#1e40af; border:1px solid #dbeafe; padding:8px 12px; border-radius:8px; font-weight:800; }
+  .footer { padding:14px 24px; background:#f8fafc; border-top:1px solid #e5e7eb; color:#64748b; font-size:12px; }
   /* Remove outer glow/shadow entirely for a flat, professional look */
 </style>
 </head>
-<body>
+"""
+
+_EMAIL_BODY = """<body>
   <div class='wrap'>
     <div class='card'>
       <div class='header'>
@@ -428,7 +565,65 @@ def _render_supplier_email_html(
 </html>
 """
 
+# Positional fields: med_name, quantity, unit_price, total_price
+_EMAIL_ROW = """
+        <tr>
+            <td class='cell'>{0}</td>
+            <td class='cell right'>{1}</td>
+            <td class='cell right'>${2:.2f}</td>
+            <td class='cell right'>${3:.2f}</td>
+        </tr>
+        """.format
+
+# Whole document as one bound formatter, so a render is a single format call;
+# the stylesheet's braces are doubled once here instead of kept apart
+_EMAIL_DOCUMENT = (
+    _EMAIL_HEAD.replace("{", "{{").replace("}", "}}") + _EMAIL_BODY
+).format
+
+
+# Escapes text for HTML content in one C-level pass (same entities as html.escape)
+_HTML_ESCAPE = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+
+
+def _escape_html(value: Any) -> Any:
+    return value.translate(_HTML_ESCAPE) if isinstance(value, str) else value
+
+
+def _render_supplier_email_html(
+    supplier_name: str,
+    po_lines: List[Dict[str, Any]],
+    meta: Dict[str, Any],
+    total: float,
+) -> str:
+    """Render the request email; total is the PO total the caller already has"""
+    rows = "".join(
+        [
+            _EMAIL_ROW(
+                _escape_html(line["med_name"]),
+                line["quantity"],
+                line["unit_price"],
+                line["total_price"],
+            )
+            for line in po_lines
+        ]
+    )
+
+    return _EMAIL_DOCUMENT(
+        supplier_name=_escape_html(supplier_name),
+        requested=_escape_html(meta.get("requested_delivery_date") or "-"),
+        buyer=_escape_html(meta.get("buyer") or "-"),
+        notes=_escape_html(meta.get("notes") or "-"),
+        rows=rows,
+        total=total,
+    )
+
 
+# Environment is read once; .env is loaded before the first request, and
+# changes to SMTP_* / EMAIL_* / SUPPLIER_FALLBACK_EMAIL need a restart
+@lru_cache(maxsize=1)
 def _smtp_settings() -> Dict[str, Any]:
     return {
         "host": os.getenv("SMTP_HOST", os.getenv("GMAIL_HOST", "smtp.zoho.com")),
@@ -441,13 +636,13 @@ def _smtp_settings() -> Dict[str, Any]:
         ),
         "use_starttls": os.getenv("SMTP_STARTTLS", "false").lower() == "true",
         "use_ssl": os.getenv("SMTP_SSL", "true").lower() != "false",
+        "timeout": float(os.getenv("SMTP_TIMEOUT", "30")),
+        "bcc": os.getenv("EMAIL_BCC"),
+        "fallback_to": os.getenv("SUPPLIER_FALLBACK_EMAIL"),
     }
 
 
-def _send_email_via_smtp(
-    subject: str, html_body: str, to_email: str, bcc: Optional[str] = None
-):
-    cfg = _smtp_settings()
+def _require_smtp_config(cfg: Dict[str, Any]) -> None:
     if not cfg["user"] or not cfg["password"]:
         email_logger.error(
             "Email not configured: missing SMTP_USER/SMTP_PASSWORD (or GMAIL_*)"
@@ -457,114 +652,216 @@ def _send_email_via_smtp(
             detail="Email is not configured. Set SMTP_USER and SMTP_PASSWORD in .env",
         )
 
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = f"{cfg['from_name']} <{cfg['from_addr']}>"
-    msg["To"] = to_email
-    if bcc:
-        msg["Bcc"] = bcc
 
-    msg.attach(MIMEText(html_body, "html", "utf-8"))
+class SmtpSession:
+    """One authenticated SMTP connection reused for several messages
 
-    context = ssl.create_default_context()
-    email_logger.info(
-        f"Email send start | host={cfg['host']} | port={cfg['port']} | to={to_email} | subject={subject}"
-    )
-    try:
+    The connection is opened on the first send, pinged with NOOP before each
+    later send, and reopened if the server has dropped it.
+    """
+
+    def __init__(self, cfg: Optional[Dict[str, Any]] = None):
+        self.cfg = cfg or _smtp_settings()
+        self.server: Optional[smtplib.SMTP] = None
+
+    def __enter__(self) -> "SmtpSession":
+        _require_smtp_config(self.cfg)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _connect(self) -> None:
+        cfg = self.cfg
+        context = ssl.create_default_context()
         if cfg["use_starttls"]:
-            with smtplib.SMTP(cfg["host"], cfg["port"]) as server:
-                server.ehlo()
-                server.starttls(context=context)
-                server.login(cfg["user"], cfg["password"])
-                server.send_message(msg)
+            server = smtplib.SMTP(cfg["host"], cfg["port"], timeout=cfg["timeout"])
+            server.ehlo()
+            server.starttls(context=context)
         elif cfg["use_ssl"]:
-            with smtplib.SMTP_SSL(cfg["host"], cfg["port"], context=context) as server:
-                server.login(cfg["user"], cfg["password"])
-                server.send_message(msg)
+            server = smtplib.SMTP_SSL(
+                cfg["host"], cfg["port"], timeout=cfg["timeout"], context=context
+            )
         else:
-            with smtplib.SMTP(cfg["host"], cfg["port"]) as server:
-                server.login(cfg["user"], cfg["password"])
-                server.send_message(msg)
-        email_logger.info(f"Email send success | to={to_email} | subject={subject}")
-    except smtplib.SMTPAuthenticationError as e:
-        email_logger.exception(
-            f"SMTP auth failed | host={cfg['host']} | user={cfg['user']} | error={e}"
-        )
-        raise HTTPException(
-            status_code=500,
-            detail="SMTP authentication failed. Check SMTP_USER/SMTP_PASSWORD and 2FA/app password settings.",
-        )
-    except Exception as e:
-        email_logger.exception(
-            f"Email send failed | host={cfg['host']} | to={to_email} | error={e}"
+            server = smtplib.SMTP(cfg["host"], cfg["port"], timeout=cfg["timeout"])
+        server.login(cfg["user"], cfg["password"])
+        self.server = server
+
+    def _ensure_connected(self) -> None:
+        if self.server is None:
+            self._connect()
+            return
+        try:
+            self.server.noop()
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            self._connect()
+
+    def close(self) -> None:
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.server = None
+
+    def send(
+        self, subject: str, html_body: str, to_email: str, bcc: Optional[str] = None
+    ) -> None:
+        cfg = self.cfg
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = f"{cfg['from_name']} <{cfg['from_addr']}>"
+        msg["To"] = to_email
+        if bcc:
+            msg["Bcc"] = bcc
+
+        msg.attach(MIMEText(html_body, "html", "utf-8"))
+
+        email_logger.info(
+            f"Email send start | host={cfg['host']} | port={cfg['port']} | to={to_email} | subject={subject}"
         )
-        raise HTTPException(status_code=500, detail=str(e))
+        try:
+            self._ensure_connected()
+            try:
+                self.server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                # Dropped between the NOOP and the send; retry once
+                self.close()
+                self._connect()
+                self.server.send_message(msg)
+            email_logger.info(f"Email send success | to={to_email} | subject={subject}")
+        except smtplib.SMTPAuthenticationError as e:
+            email_logger.exception(
+                f"SMTP auth failed | host={cfg['host']} | user={cfg['user']} | error={e}"
+            )
+            raise HTTPException(
+                status_code=500,
+                detail="SMTP authentication failed. Check SMTP_USER/SMTP_PASSWORD and 2FA/app password settings.",
+            )
+        except Exception as e:
+            email_logger.exception(
+                f"Email send failed | host={cfg['host']} | to={to_email} | error={e}"
+            )
+            raise HTTPException(status_code=500, detail=str(e))
+
 
+# Idle authenticated sessions kept open between requests
+SMTP_POOL_SIZE = max(1, int(os.getenv("SMTP_POOL_SIZE", "4")))
+_smtp_pool: "queue.LifoQueue[SmtpSession]" = queue.LifoQueue(maxsize=SMTP_POOL_SIZE)
 
-@router.post("/purchase-orders/send-emails")
-async def send_po_emails(payload: Dict[str, Any]):
-    """Draft and send HTML PO request emails to all involved suppliers before PO submission."""
+
+def _acquire_smtp_session() -> SmtpSession:
+    """Take an idle pooled session, or start a new one if none is free"""
     try:
-        items = payload.get("items", [])
-        meta = payload.get("meta", {})
-        email_logger.info(f"Pre-submit email flow start | items={len(items)}")
-
-        # Group allocations by supplier similar to PO creation
-        supplier_to_lines: Dict[int, List[Dict[str, Any]]] = {}
-        for item in items:
-            med_id = int(item.get("med_id"))
-            med_info = data_loader.medications.get(med_id, {})
-            med_name = med_info.get("name", f"Medication {med_id}")
-            for alloc in item.get("allocations", []):
-                supplier_id = int(alloc.get("supplier_id"))
-                quantity = int(alloc.get("quantity", 0))
-                unit_price = float(alloc.get("unit_price", 0))
-                if quantity <= 0:
-                    continue
-                supplier_to_lines.setdefault(supplier_id, []).append(
-                    {
-                        "med_id": med_id,
-                        "med_name": med_name,
-                        "quantity": quantity,
-                        "unit_price": unit_price,
-                        "total_price": quantity * unit_price,
-                    }
-                )
-
-        if not supplier_to_lines:
-            email_logger.info("Pre-submit email flow: no suppliers to notify")
-            return {"sent": 0}
-
-        fallback_to = os.getenv("SUPPLIER_FALLBACK_EMAIL")
-        bcc = os.getenv("EMAIL_BCC")
-
-        sent_count = 0
-        for supplier_id, lines in supplier_to_lines.items():
-            supplier = data_loader.suppliers.get(supplier_id, {})
-            supplier_name = supplier.get("name", f"Supplier {supplier_id}")
-            to_email = (
-                supplier.get("email")
-                or fallback_to
-                or f"{_slugify(supplier_name)}@example.com"
-            )
-            subject = f"Purchase Order Request - {supplier_name}"
-            email_logger.info(
-                f"Pre-submit email: composing | supplier_id={supplier_id} | supplier={supplier_name} | to={to_email} | lines={len(lines)}"
-            )
-            html_body = _render_supplier_email_html(supplier_name, lines, meta)
-            _send_email_via_smtp(subject, html_body, to_email, bcc=bcc)
-            sent_count += 1
+        return _smtp_pool.get_nowait()
+    except queue.Empty:
+        session = SmtpSession()
+        _require_smtp_config(session.cfg)
+        return session
 
-        email_logger.info(
-            f"Pre-submit email flow success | suppliers_notified={sent_count}"
-        )
-        return {"sent": sent_count}
 
-    except HTTPException:
-        raise
+def _release_smtp_session(session: SmtpSession) -> None:
+    """Return a session to the pool, closing it if the pool is full"""
+    try:
+        _smtp_pool.put_nowait(session)
+    except queue.Full:
+        session.close()
+
+
+def shutdown_smtp_pool() -> None:
+    """Close all idle pooled SMTP connections"""
+    while True:
+        try:
+            _smtp_pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+
+def _send_email_batch(
+    messages: List[Tuple[str, str, str]], bcc: Optional[str] = None
+) -> List[Exception]:
+    """Send messages over one pooled SMTP session, returning the failures"""
+    errors: List[Exception] = []
+    session = _acquire_smtp_session()
+    try:
+        for subject, html_body, to_email in messages:
+            try:
+                session.send(subject, html_body, to_email, bcc=bcc)
+            except Exception as e:
+                errors.append(e)
+    finally:
+        # send() reconnects dropped sessions, so any session is safe to reuse
+        _release_smtp_session(session)
+    return errors
+
+
+# Parallel SMTP sessions per request; matches the pool so sends reuse logins
+EMAIL_SEND_CONCURRENCY = SMTP_POOL_SIZE
+
+
+async def _send_emails_concurrently(
+    messages: List[Tuple[str, str, str]], bcc: Optional[str] = None
+) -> int:
+    """Send (subject, html_body, to_email) messages from worker threads in parallel
+
+    Messages are spread over up to EMAIL_SEND_CONCURRENCY SMTP sessions.
+    Every send is attempted; the first failure is re-raised once all finish.
+    """
+    if not messages:
+        return 0
+    sessions = min(EMAIL_SEND_CONCURRENCY, len(messages))
+    batches = [messages[i::sessions] for i in range(sessions)]
+
+    results = await asyncio.gather(
+        *(asyncio.to_thread(_send_email_batch, batch, bcc) for batch in batches),
+        return_exceptions=True,
+    )
+    errors = []
+    for result in results:
+        errors.extend([result] if isinstance(result, BaseException) else result)
+    if errors:
+        email_logger.error(f"{len(errors)} of {len(messages)} emails failed to send")
+        raise errors[0]
+    return len(messages)
+
+
+async def _send_emails_in_background(
+    messages: List[Tuple[str, str, str]], bcc: Optional[str], flow: str
+) -> None:
+    """Send queued emails after the response; failures are logged, not raised"""
+    try:
+        sent_count = await _send_emails_concurrently(messages, bcc=bcc)
+        email_logger.info(f"{flow} email flow success | suppliers_notified={sent_count}")
     except Exception as e:
-        email_logger.exception(f"Pre-submit email flow failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        email_logger.exception(f"{flow} email flow failed: {e}")
+
+
+@router.post("/purchase-orders/send-emails", status_code=202)
+async def send_po_emails(payload: POCreatePayload, background_tasks: BackgroundTasks):
+    """Queue HTML PO request emails to all involved suppliers before PO submission."""
+    # Fail fast on missing credentials, before any grouping work; later
+    # send errors happen in the background and are only logged
+    _require_smtp_config(_smtp_settings())
+
+    items = payload.items
+    email_logger.info(f"Pre-submit email flow start | items={len(items)}")
+
+    # Group allocations by supplier, as PO creation does
+    supplier_to_lines, supplier_totals = _group_allocations(items)
+
+    if not supplier_to_lines:
+        email_logger.info("Pre-submit email flow: no suppliers to notify")
+        return {"queued": 0}
+
+    # Rendering and SMTP both run after the response
+    background_tasks.add_task(
+        _email_suppliers, supplier_to_lines, supplier_totals, payload.meta, "Pre-submit"
+    )
+    email_logger.info(
+        f"Pre-submit email flow queued | suppliers={len(supplier_to_lines)}"
+    )
+    return {"queued": len(supplier_to_lines)}
 
 
 # AI PO Generation Endpoints
@@ -575,171 +872,214 @@ async def generate_po_with_ai(
     payload: Dict[str, Any], background_tasks: BackgroundTasks
 ):
     """Generate purchase orders using AI multi-agent system (async kickoff)"""
-    try:
-        medication_ids = payload.get("medication_ids", [])
-        days_forecast = int(payload.get("days_forecast", 30))
-        urgency_threshold = float(payload.get("urgency_threshold", 0.5))
-
-        # If no medications passed, auto-select by urgency from inventory
-        if not medication_ids:
-            inv = data_loader.get_inventory_data(page_size=500)
-            urgent = []
-            for item in inv.get("items", []):
-                reorder = item.get("reorder_point") or 0
-                current = item.get("current_stock") or 0
-                if reorder <= 0:
-                    continue
-                if current <= reorder * urgency_threshold:
-                    urgent.append(int(item.get("med_id")))
-            medication_ids = urgent[:50]  # limit to 50 meds
-
-        if not medication_ids:
-            raise HTTPException(status_code=400, detail="No medications selected")
-
-        # Start background generation and return session id immediately
-        kick = ai_po_handler.start_generation_async(
-            medication_ids, background_tasks, days_forecast
-        )
-        # Echo back normalized params for client display
-        kick.update(
-            {
-                "days_forecast": days_forecast,
-                "urgency_threshold": urgency_threshold,
-            }
-        )
-        return kick
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    medication_ids = payload.get("medication_ids", [])
+    days_forecast = int(payload.get("days_forecast", 30))
+    urgency_threshold = float(payload.get("urgency_threshold", 0.5))
+
+    # If no medications passed, auto-select by urgency from inventory
+    if not medication_ids:
+        inv = data_loader.get_inventory_data(page_size=500)
+        urgent = []
+        for item in inv.get("items", []):
+            reorder = item.get("reorder_point") or 0
+            current = item.get("current_stock") or 0
+            if reorder <= 0:
+                continue
+            if current <= reorder * urgency_threshold:
+                urgent.append(int(item.get("med_id")))
+        medication_ids = urgent[:50]  # limit to 50 meds
+
+    if not medication_ids:
+        raise HTTPException(status_code=400, detail="No medications selected")
+
+    # Start background generation and return session id immediately
+    kick = ai_po_handler.start_generation_async(
+        medication_ids, background_tasks, days_forecast
+    )
+    # Echo back normalized params for client display
+    kick.update(
+        {
+            "days_forecast": days_forecast,
+            "urgency_threshold": urgency_threshold,
+        }
+    )
+    return kick
 
 
 @router.get("/purchase-orders/ai-status/{session_id}")
-async def get_ai_generation_status(session_id: str):
-    """Check status of AI PO generation"""
-    try:
-        status = await ai_po_handler.get_status(session_id)
-        return status
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def get_ai_generation_status(
+    session_id: str,
+    since: Optional[str] = Query(
+        None, description="Last seen updated_at; waits for a newer status"
+    ),
+    timeout: int = Query(25, ge=0, le=60, description="Max seconds to wait"),
+):
+    """Check status of AI PO generation, long-polling when since is given"""
+    status = await ai_po_handler.wait_for_change(session_id, since, timeout)
+    return status
+
+
+# Session states after which no further status updates are pushed
+_AI_TERMINAL_STATUSES = {"completed", "failed", "unknown"}
+
+
+@router.get("/purchase-orders/ai-stream/{session_id}")
+async def stream_ai_generation_status(session_id: str):
+    """Push AI PO generation status changes as server-sent events"""
+
+    async def _events():
+        since = None
+        while True:
+            status = await ai_po_handler.wait_for_change(session_id, since, 25)
+            if since is None or status.get("updated_at") != since:
+                yield b"data: " + orjson.dumps(status, default=str) + b"\n\n"
+            else:
+                # Comment line keeps idle proxies from closing the stream
+                yield b": keep-alive\n\n"
+            if status.get("status") in _AI_TERMINAL_STATUSES:
+                break
+            since = status.get("updated_at")
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 
-@router.get("/purchase-orders/ai-result/{session_id}")
+@router.get("/purchase-orders/ai-result/{session_id}", response_model=None)
 async def get_ai_generation_result(session_id: str):
     """Get result of completed AI PO generation"""
-    try:
-        result = await ai_po_handler.get_result(session_id)
-        return result
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    result = await ai_po_handler.get_result(session_id)
+    return result
+
+
+async def _email_ai_po_suppliers(
+    po_list: List[Dict[str, Any]], meta: Dict[str, Any]
+) -> None:
+    """Compose one email per saved AI PO and send them; runs as a background task"""
+    cfg = _smtp_settings()
+    fallback_to = cfg["fallback_to"]
+    bcc = cfg["bcc"]
+    email_logger.info(f"AI-create email flow start | suppliers={len(po_list)}")
+    suppliers = data_loader.get_suppliers_bulk(
+        {po_data["supplier_id"] for po_data in po_list}
+    )
+    messages = []
+    for po_data in po_list:
+        supplier_id = po_data["supplier_id"]
+        supplier_name = po_data["supplier_name"]
+        lines = [
+            {
+                "med_id": it["med_id"],
+                "med_name": it["med_name"],
+                "quantity": it["quantity"],
+                "unit_price": it["unit_price"],
+                "total_price": it["subtotal"],
+            }
+            for it in po_data["items"]
+        ]
+        html_body = _render_supplier_email_html(
+            supplier_name, lines, meta, po_data["total_amount"]
+        )
+        to_email = (
+            suppliers.get(supplier_id, {}).get("email")
+            or fallback_to
+            or f"{_slugify(supplier_name)}@example.com"
+        )
+        subject = f"Purchase Order Request - {supplier_name}"
+        email_logger.info(
+            f"AI-create email: composing | supplier_id={supplier_id} | supplier={supplier_name} | to={to_email} | lines={len(lines)}"
+        )
+        messages.append((subject, html_body, to_email))
+
+    await _send_emails_in_background(messages, bcc, "AI-create")
 
 
 @router.post("/purchase-orders/create-from-ai")
-async def create_po_from_ai_result(payload: Dict[str, Any]):
+async def create_po_from_ai_result(
+    payload: AIPOCreatePayload, background_tasks: BackgroundTasks
+):
     """Create actual purchase orders from AI generation result"""
-    try:
-        ai_result = payload.get("ai_result", {})
-        meta = payload.get("meta", {})
-
-        # Transform AI result to PO format
-        po_list = ai_po_handler.transform_to_po_format(ai_result)
-
-        created_pos = []
-        now_iso = datetime.utcnow().isoformat() + "Z"
-        year = datetime.utcnow().year
-        po_counter = len(data_loader.list_purchase_orders()) + 1
-
-        # Before saving, send emails to suppliers represented in po_list
-        fallback_to = os.getenv("SUPPLIER_FALLBACK_EMAIL")
-        bcc = os.getenv("EMAIL_BCC")
-        email_logger.info(f"AI-create email flow start | suppliers={len(po_list)}")
-        for po_data in po_list:
-            supplier_id = po_data["supplier_id"]
-            supplier_name = po_data["supplier_name"]
-            lines = [
-                {
-                    "med_id": it["med_id"],
-                    "med_name": it["med_name"],
-                    "quantity": it["quantity"],
-                    "unit_price": it["unit_price"],
-                    "total_price": it["subtotal"],
-                }
-                for it in po_data["items"]
-            ]
-            html_body = _render_supplier_email_html(supplier_name, lines, meta)
-            to_email = (
-                data_loader.suppliers.get(supplier_id, {}).get("email")
-                or fallback_to
-                or f"{_slugify(supplier_name)}@example.com"
-            )
-            subject = f"Purchase Order Request - {supplier_name}"
-            email_logger.info(
-                f"AI-create email: composing | supplier_id={supplier_id} | supplier={supplier_name} | to={to_email} | lines={len(lines)}"
-            )
-            _send_email_via_smtp(subject, html_body, to_email, bcc=bcc)
-        email_logger.info("AI-create email flow success")
-
-        for po_data in po_list:
-            po_id = f"PO-{datetime.utcnow().strftime('%Y%m%d')}-{str(uuid4())[:8].upper()}-AI"
-            po_number = f"PO-{year}-{po_counter:05d}-AI"
-
-            # Create PO record
-            po_record = {
-                "po_id": po_id,
-                "po_number": po_number,
-                "supplier_id": po_data["supplier_id"],
-                "supplier_name": po_data["supplier_name"],
-                "status": "draft",
-                "total_amount": po_data["total_amount"],
-                "created_at": now_iso,
-                "updated_at": now_iso,
-                "requested_delivery_date": meta.get("requested_delivery_date"),
-                "notes": f"AI Generated - {meta.get('notes', '')}",
-                "created_by": meta.get("buyer", "AI System"),
-                "items": po_data["items"],
-                "metadata": po_data.get("metadata", {}),
-            }
+    ai_result = payload.ai_result
+    meta = payload.meta
 
-            # Save to database
-            data_loader.save_purchase_order(po_record)
-            created_pos.append(po_record)
-            po_counter += 1
+    # Transform AI result to PO format
+    po_list = ai_po_handler.transform_to_po_format(ai_result)
 
-        return {
-            "created": [po["po_id"] for po in created_pos],
-            "purchase_orders": created_pos,
-        }
+    created_pos = []
+    now = datetime.utcnow()
+    now_iso = now.isoformat() + "Z"
+    today = now.strftime("%Y%m%d")
+    year = now.year
 
-    except Exception as e:
-        email_logger.exception(f"AI-create email flow failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    first_sequence = await asyncio.to_thread(
+        data_loader.next_po_number, year, len(po_list)
+    )
+    for po_sequence, po_data in enumerate(po_list, start=first_sequence):
+        po_id = f"PO-{today}-{secrets.token_hex(4).upper()}-AI"
+        po_number = f"PO-{year}-{po_sequence:05d}-AI"
+
+        # Create PO record
+        po_record = _build_po_record(
+            po_id,
+            po_number,
+            po_data["supplier_id"],
+            po_data["supplier_name"],
+            po_data["total_amount"],
+            po_data["items"],
+            now_iso,
+            meta,
+            notes=f"AI Generated - {meta.get('notes', '')}",
+            created_by=meta.get("buyer", "AI System"),
+        )
+        po_record["metadata"] = po_data.get("metadata", {})
+
+        created_pos.append(po_record)
+
+    # Save all POs of the payload in one transaction; emails are composed and
+    # sent only after the commit, so neither holds up the response or the save
+    if created_pos:
+        await asyncio.to_thread(data_loader.save_purchase_orders, created_pos)
+        _invalidate_medication_details(created_pos)
+        background_tasks.add_task(_email_ai_po_suppliers, po_list, meta)
+
+    return {
+        "created": [po["po_id"] for po in created_pos],
+        "purchase_orders": created_pos,
+    }
+
+
+# Status body built once per loaded config; reload_config() swaps the object
+_ai_config_status: Optional[Tuple[Any, Dict[str, Any]]] = None
+
+
+def _build_ai_config_status(config) -> Dict[str, Any]:
+    """Summarize the AI config for the frontend"""
+    has_api_key = bool(
+        config.openai_api_key and config.openai_api_key != "your_openai_api_key_here"
+    )
+
+    return {
+        "configured": has_api_key,
+        "model": config.model_name if has_api_key else None,
+        "features_enabled": {
+            "forecasting": True,
+            "adjustment": config.adjustment_factors_enabled,
+            "order_splitting": config.enable_order_splitting,
+            "caching": config.enable_cache,
+        },
+    }
 
 
 @router.get("/ai/config-status")
 async def get_ai_config_status():
     """Check if AI is properly configured"""
+    global _ai_config_status
     try:
-        from ai_agents.config import get_config
-
         config = get_config()
-
-        has_api_key = bool(
-            config.openai_api_key
-            and config.openai_api_key != "your_openai_api_key_here"
-        )
-
-        return {
-            "configured": has_api_key,
-            "model": config.model_name if has_api_key else None,
-            "features_enabled": {
-                "forecasting": True,
-                "adjustment": config.adjustment_factors_enabled,
-                "order_splitting": config.enable_order_splitting,
-                "caching": config.enable_cache,
-            },
-        }
+        if _ai_config_status is None or _ai_config_status[0] is not config:
+            _ai_config_status = (config, _build_ai_config_status(config))
+        return _ai_config_status[1]
     except Exception as e:
         return {"configured": False, "error": str(e)}
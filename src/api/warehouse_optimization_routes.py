@@ -3,20 +3,15 @@ Warehouse Optimization API Routes
 Endpoints for AI-powered warehouse optimization analysis and recommendations
 """
 
-import sys
-import os
 from typing import Dict, Any, Optional, List
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks, WebSocket, WebSocketDisconnect
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from loguru import logger
 import json
 import asyncio
 from datetime import datetime
 import pandas as pd
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from data_loader import DataLoader
 from services.warehouse_optimization_handler import WarehouseOptimizationHandler
 from api.warehouse_routes import (
@@ -26,7 +21,11 @@ from api.warehouse_routes import (
 )
 
 # Initialize router
-router = APIRouter(prefix="/warehouse/optimization", tags=["warehouse-optimization"])
+router = APIRouter(
+    prefix="/warehouse/optimization",
+    tags=["warehouse-optimization"],
+    default_response_class=ORJSONResponse,
+)
 
 # Global instances
 data_loader = DataLoader()
@@ -36,6 +35,40 @@ optimization_handler = WarehouseOptimizationHandler()
 optimization_logger = logger.bind(name="warehouse_optimization")
 
 
+# Optimization dashboard summaries, one row each
+DASHBOARD_MOVEMENT_QUERY = """
+    SELECT
+        COUNT(*) as total_movements,
+        COUNT(DISTINCT position_id) as unique_positions,
+        COUNT(DISTINCT med_id) as unique_medications,
+        COUNT(DISTINCT movement_type) as movement_types,
+        COUNT(DISTINCT operator_id) as unique_operators
+    FROM movement_history
+    WHERE movement_date >= datetime('now', '-30 days')
+"""
+
+DASHBOARD_COMPLIANCE_QUERY = """
+    SELECT
+        COUNT(CASE WHEN days_until_expiry <= 0 THEN 1 END) as expired_items,
+        COUNT(CASE WHEN days_until_expiry BETWEEN 1 AND 7 THEN 1 END) as expiring_7_days,
+        COUNT(CASE WHEN days_until_expiry BETWEEN 8 AND 30 THEN 1 END) as expiring_30_days,
+        COUNT(*) as total_batches
+    FROM (
+        SELECT
+            batch_id,
+            julianday(expiry_date) - julianday('now') as days_until_expiry
+        FROM batch_info
+        WHERE is_active = 1
+    )
+"""
+
+
+def _read_dashboard_row(query: str) -> Dict[str, Any]:
+    """Run a one-row summary query on a pooled connection"""
+    with data_loader.pooled_connection() as conn:
+        return pd.read_sql_query(query, conn).to_dict("records")[0]
+
+
 @router.get("/dashboard")
 async def get_optimization_dashboard():
     """
@@ -46,45 +79,21 @@ async def get_optimization_dashboard():
     try:
         optimization_logger.info("Fetching optimization dashboard")
 
-        # Get chaos metrics
-        chaos_data = await get_chaos_metrics()
-
-        # Get fragmentation data
-        fragmentation_data = await get_batch_fragmentation()
-
-        # Get velocity mismatches
-        velocity_data = await get_velocity_mismatches()
-
-        # Get movement statistics
-        conn = data_loader.get_connection()
-        movement_query = """
-            SELECT
-                COUNT(*) as total_movements,
-                COUNT(DISTINCT position_id) as unique_positions,
-                COUNT(DISTINCT med_id) as unique_medications,
-                COUNT(DISTINCT movement_type) as movement_types,
-                COUNT(DISTINCT operator_id) as unique_operators
-            FROM movement_history
-            WHERE movement_date >= datetime('now', '-30 days')
-        """
-        movement_stats = pd.read_sql_query(movement_query, conn).to_dict("records")[0]
-
-        # Get compliance summary
-        compliance_query = """
-            SELECT
-                COUNT(CASE WHEN days_until_expiry <= 0 THEN 1 END) as expired_items,
-                COUNT(CASE WHEN days_until_expiry BETWEEN 1 AND 7 THEN 1 END) as expiring_7_days,
-                COUNT(CASE WHEN days_until_expiry BETWEEN 8 AND 30 THEN 1 END) as expiring_30_days,
-                COUNT(*) as total_batches
-            FROM (
-                SELECT
-                    batch_id,
-                    julianday(expiry_date) - julianday('now') as days_until_expiry
-                FROM batch_info
-                WHERE is_active = 1
-            )
-        """
-        compliance_summary = pd.read_sql_query(compliance_query, conn).to_dict("records")[0]
+        # The five reads are independent; each runs on its own worker thread
+        # and pooled connection, so the wait is the slowest one, not the sum
+        (
+            chaos_data,
+            fragmentation_data,
+            velocity_data,
+            movement_stats,
+            compliance_summary,
+        ) = await asyncio.gather(
+            get_chaos_metrics(),
+            get_batch_fragmentation(),
+            get_velocity_mismatches(),
+            asyncio.to_thread(_read_dashboard_row, DASHBOARD_MOVEMENT_QUERY),
+            asyncio.to_thread(_read_dashboard_row, DASHBOARD_COMPLIANCE_QUERY),
+        )
 
         # Calculate optimization opportunities
         total_optimizations = (
@@ -684,83 +693,89 @@ async def optimization_websocket(websocket: WebSocket):
 
 # Helper functions
 
-async def _gather_warehouse_data() -> Dict[str, Any]:
-    """Gather comprehensive warehouse data for analysis"""
-    conn = data_loader.get_connection()
+def _read_warehouse_tables() -> Dict[str, Any]:
+    """Read placements, movements, batches and layout for the analysis"""
+    with data_loader.pooled_connection() as conn:
+        # Get current placements
+        placements_query = """
+            SELECT
+                mp.*,
+                m.name as medication_name,
+                ma.movement_category,
+                ma.velocity_score,
+                sp.grid_x, sp.grid_y, sp.grid_z
+            FROM medication_placements mp
+            JOIN medications m ON mp.med_id = m.med_id
+            JOIN medication_attributes ma ON m.med_id = ma.med_id
+            JOIN shelf_positions sp ON mp.position_id = sp.position_id
+            WHERE mp.is_active = 1
+        """
+        current_placements = pd.read_sql_query(placements_query, conn).to_dict("records")
 
-    # Get chaos metrics
-    chaos_data = await get_chaos_metrics()
+        # Get movement history
+        movement_query = """
+            SELECT * FROM movement_history
+            WHERE movement_date >= datetime('now', '-30 days')
+            ORDER BY movement_date DESC
+            LIMIT 1000
+        """
+        movement_history = pd.read_sql_query(movement_query, conn).to_dict("records")
 
-    # Get fragmentation data
-    fragmentation_data = await get_batch_fragmentation()
+        # Get batch info
+        batch_query = """
+            SELECT * FROM batch_info
+            WHERE is_active = 1
+        """
+        batch_info = pd.read_sql_query(batch_query, conn).to_dict("records")
 
-    # Get velocity mismatches
-    velocity_data = await get_velocity_mismatches()
+        # Get hourly patterns
+        hourly_query = """
+            SELECT
+                strftime('%H', movement_date) as hour,
+                COUNT(*) as movements
+            FROM movement_history
+            WHERE movement_date >= datetime('now', '-7 days')
+            GROUP BY hour
+        """
+        hourly_patterns = pd.read_sql_query(hourly_query, conn).to_dict("records")
 
-    # Get current placements
-    placements_query = """
-        SELECT
-            mp.*,
-            m.name as medication_name,
-            ma.movement_category,
-            ma.velocity_score,
-            sp.grid_x, sp.grid_y, sp.grid_z
-        FROM medication_placements mp
-        JOIN medications m ON mp.med_id = m.med_id
-        JOIN medication_attributes ma ON m.med_id = ma.med_id
-        JOIN shelf_positions sp ON mp.position_id = sp.position_id
-        WHERE mp.is_active = 1
-    """
-    current_placements = pd.read_sql_query(placements_query, conn).to_dict("records")
-
-    # Get movement history
-    movement_query = """
-        SELECT * FROM movement_history
-        WHERE movement_date >= datetime('now', '-30 days')
-        ORDER BY movement_date DESC
-        LIMIT 1000
-    """
-    movement_history = pd.read_sql_query(movement_query, conn).to_dict("records")
+        # Get warehouse layout info
+        layout_query = """
+            SELECT
+                COUNT(DISTINCT aisle_id) as aisle_count,
+                COUNT(DISTINCT shelf_id) as shelf_count,
+                COUNT(DISTINCT position_id) as total_positions,
+                COUNT(DISTINCT position_id) - COUNT(DISTINCT mp.position_id) as available_positions
+            FROM shelf_positions sp
+            LEFT JOIN medication_placements mp ON sp.position_id = mp.position_id AND mp.is_active = 1
+        """
+        layout_info = pd.read_sql_query(layout_query, conn).to_dict("records")[0]
 
-    # Get batch info
-    batch_query = """
-        SELECT * FROM batch_info
-        WHERE is_active = 1
-    """
-    batch_info = pd.read_sql_query(batch_query, conn).to_dict("records")
+        return {
+            "current_placements": current_placements,
+            "movement_history": movement_history,
+            "batch_info": batch_info,
+            "hourly_patterns": hourly_patterns,
+            "warehouse_layout": layout_info,
+        }
 
-    # Get hourly patterns
-    hourly_query = """
-        SELECT
-            strftime('%H', movement_date) as hour,
-            COUNT(*) as movements
-        FROM movement_history
-        WHERE movement_date >= datetime('now', '-7 days')
-        GROUP BY hour
-    """
-    hourly_patterns = pd.read_sql_query(hourly_query, conn).to_dict("records")
 
-    # Get warehouse layout info
-    layout_query = """
-        SELECT
-            COUNT(DISTINCT aisle_id) as aisle_count,
-            COUNT(DISTINCT shelf_id) as shelf_count,
-            COUNT(DISTINCT position_id) as total_positions,
-            COUNT(DISTINCT position_id) - COUNT(DISTINCT mp.position_id) as available_positions
-        FROM shelf_positions sp
-        LEFT JOIN medication_placements mp ON sp.position_id = mp.position_id AND mp.is_active = 1
-    """
-    layout_info = pd.read_sql_query(layout_query, conn).to_dict("records")[0]
+async def _gather_warehouse_data() -> Dict[str, Any]:
+    """Gather comprehensive warehouse data for analysis"""
+    # Chaos metrics, fragmentation, velocity mismatches and the table reads
+    # are independent, so they run concurrently on worker threads
+    chaos_data, fragmentation_data, velocity_data, tables = await asyncio.gather(
+        get_chaos_metrics(),
+        get_batch_fragmentation(),
+        get_velocity_mismatches(),
+        asyncio.to_thread(_read_warehouse_tables),
+    )
 
     return {
         "chaos_metrics": chaos_data,
         "fragmentation_data": fragmentation_data,
         "velocity_mismatches": velocity_data,
-        "current_placements": current_placements,
-        "movement_history": movement_history,
-        "batch_info": batch_info,
-        "hourly_patterns": hourly_patterns,
-        "warehouse_layout": layout_info,
+        **tables,
         "temperature_data": {},  # Would come from sensors
         "zone_violations": [],  # Would be calculated
         "fifo_violations": [],  # Would be calculated
@@ -8,7 +8,10 @@ This module provides API endpoints for warehouse management including:
 - Real-time temperature and alerts
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
@@ -17,7 +20,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/warehouse", tags=["warehouse"])
+router = APIRouter(
+    prefix="/api/warehouse", tags=["warehouse"], default_response_class=ORJSONResponse
+)
 
 
 class WarehouseStats(BaseModel):
@@ -1028,18 +1033,11 @@ async def get_movement_statistics(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/chaos/metrics")
-async def get_chaos_metrics():
-    """
-    Get current chaos metrics for the warehouse
-
-    Returns metrics showing warehouse inefficiencies and optimization potential
-    """
-    try:
-        from api.routes import data_loader
-
-        conn = data_loader.get_connection()
+def _chaos_metrics() -> Dict[str, Any]:
+    """Read chaos metrics and the overall score; runs in a worker thread"""
+    from api.routes import data_loader
 
+    with data_loader.pooled_connection() as conn:
         # Get all chaos metrics
         metrics_query = """
             SELECT
@@ -1071,23 +1069,26 @@ async def get_chaos_metrics():
             }
         )
 
-    except Exception as e:
-        logger.error(f"Error fetching chaos metrics: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
 
-
-@router.get("/chaos/batch-fragmentation")
-async def get_batch_fragmentation():
+@router.get("/chaos/metrics")
+async def get_chaos_metrics():
     """
-    Get details of fragmented batches that need consolidation
+    Get current chaos metrics for the warehouse
 
-    Shows batches split across multiple locations
+    Returns metrics showing warehouse inefficiencies and optimization potential
     """
     try:
-        from api.routes import data_loader
+        return await asyncio.to_thread(_chaos_metrics)
+    except Exception as e:
+        logger.error(f"Error fetching chaos metrics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        conn = data_loader.get_connection()
 
+def _batch_fragmentation() -> Dict[str, Any]:
+    """Read fragmented batches and the fragmentation rate; runs in a worker thread"""
+    from api.routes import data_loader
+
+    with data_loader.pooled_connection() as conn:
         # Find fragmented batches
         fragmentation_query = """
             SELECT
@@ -1134,23 +1135,26 @@ async def get_batch_fragmentation():
             }
         )
 
-    except Exception as e:
-        logger.error(f"Error fetching batch fragmentation: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
 
-
-@router.get("/chaos/velocity-mismatches")
-async def get_velocity_mismatches():
+@router.get("/chaos/batch-fragmentation")
+async def get_batch_fragmentation():
     """
-    Get medications placed in wrong zones based on velocity
+    Get details of fragmented batches that need consolidation
 
-    Shows fast-moving items in back zones and slow-moving items in prime locations
+    Shows batches split across multiple locations
     """
     try:
-        from api.routes import data_loader
+        return await asyncio.to_thread(_batch_fragmentation)
+    except Exception as e:
+        logger.error(f"Error fetching batch fragmentation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        conn = data_loader.get_connection()
 
+def _velocity_mismatches() -> Dict[str, Any]:
+    """Read velocity/zone mismatches and the mapping; runs in a worker thread"""
+    from api.routes import data_loader
+
+    with data_loader.pooled_connection() as conn:
         # Find velocity mismatches
         mismatch_query = """
             SELECT
@@ -1203,6 +1207,16 @@ async def get_velocity_mismatches():
             }
         )
 
+
+@router.get("/chaos/velocity-mismatches")
+async def get_velocity_mismatches():
+    """
+    Get medications placed in wrong zones based on velocity
+
+    Shows fast-moving items in back zones and slow-moving items in prime locations
+    """
+    try:
+        return await asyncio.to_thread(_velocity_mismatches)
     except Exception as e:
         logger.error(f"Error fetching velocity mismatches: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -11,6 +11,7 @@ Performance optimizations include:
 """
 
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 import pandas as pd
@@ -21,7 +22,11 @@ from src.utils.cache_manager import warehouse_cache
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/warehouse/v2", tags=["warehouse-optimized"])
+router = APIRouter(
+    prefix="/api/warehouse/v2",
+    tags=["warehouse-optimized"],
+    default_response_class=ORJSONResponse,
+)
 
 
 class WarehouseStats(BaseModel):
@@ -4,10 +4,14 @@ Now uses SQLite database instead of CSV files
 """
 
 import os
+import queue
 import sqlite3
-import json
+from bisect import bisect_right
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import timedelta
-from typing import Any, Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -38,7 +42,72 @@ def clean_nan_values(data):
         return data
 
 
+# Per-connection tuning: 64 MB page cache, 256 MB mmap, in-memory temp tables,
+# and fewer fsyncs (safe with WAL)
+CONNECTION_PRAGMAS = (
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA synchronous = NORMAL",
+)
+
+
+# Purchase orders with item counts and expected delivery, newest first
+PO_SUMMARY_QUERY = """
+    SELECT po.*, 
+           COUNT(CASE WHEN poi.item_id IS NOT NULL THEN 1 END) as item_count,
+           SUM(poi.quantity) as total_quantity,
+           s.avg_lead_time,
+           datetime(po.created_at, '+' || COALESCE(s.avg_lead_time, 7) || ' days') as expected_delivery_date
+    FROM purchase_orders po
+    LEFT JOIN purchase_order_items poi ON po.po_id = poi.po_id
+    LEFT JOIN suppliers s ON po.supplier_id = s.supplier_id
+    {where}
+    GROUP BY po.po_id
+    ORDER BY po.created_at DESC
+"""
+
+# PO list rows, projected and named as the /purchase-orders response expects.
+# Item counts come from a correlated count so rows stream in created_at order
+# from idx_purchase_orders_created without grouping and sorting the whole table
+PO_LIST_QUERY = """
+    SELECT json_object(
+           'po_id', po.po_id,
+           'po_number', COALESCE(po.po_number, po.po_id),
+           'supplier_id', po.supplier_id,
+           'supplier_name', po.supplier_name,
+           'status', po.status,
+           'created_at', po.created_at,
+           'expected_delivery_date',
+           datetime(po.created_at, '+' || COALESCE(s.avg_lead_time, 7) || ' days'),
+           'total_lines', (SELECT COUNT(*) FROM purchase_order_items poi
+                           WHERE poi.po_id = po.po_id),
+           'total_amount', po.total_amount
+           )
+    FROM purchase_orders po
+    LEFT JOIN suppliers s ON po.supplier_id = s.supplier_id
+    ORDER BY po.created_at DESC
+"""
+
+# Prepared statements kept per pooled connection (sqlite3 default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+# Inventory order; med_id breaks name ties so a cursor position is unambiguous
+INVENTORY_SORT_KEY = itemgetter("name", "med_id")
+
+
+class MedicationNotFound(Exception):
+    """Raised when a medication has no data for the requested lookup"""
+
+
 class DataLoader:
+    # Connections kept open for reuse by pooled_connection()
+    POOL_SIZE = 5
+    # journal_mode is persistent in the database file, so it is set once per process
+    _wal_enabled = False
+    # Set once the PO number counter table is known to exist
+    _po_counters_ready = False
+
     def __init__(self, db_path: str = None):
         # Get the database path
         if db_path is None:
@@ -52,7 +121,9 @@ class DataLoader:
         # Initialize data containers
         self.medications = {}
         self.suppliers = {}
+        self._supplier_list: Optional[List[Dict[str, Any]]] = None
         self.consumption_history = {}
+        self.consumption_by_med = {}
         self.sku_meta = {}
         self.storage_locations = {}
         self.slot_assignments = {}
@@ -66,21 +137,59 @@ class DataLoader:
 
         # Database connection (will be created on demand)
         self._conn = None
+        self._pool = queue.LifoQueue(maxsize=self.POOL_SIZE)
 
     def get_connection(self):
         """Get a fresh database connection"""
         # Always return a new connection to avoid "closed database" errors
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row  # Enable column access by name
+        self._tune_connection(conn)
         return conn
 
+    def _tune_connection(self, conn: sqlite3.Connection):
+        """Apply cache, mmap and journaling PRAGMAs to a new connection"""
+        if not DataLoader._wal_enabled:
+            conn.execute("PRAGMA journal_mode = WAL")
+            DataLoader._wal_enabled = True
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
+    @contextmanager
+    def pooled_connection(self):
+        """Borrow a reusable connection that can be used from worker threads
+
+        Connections are returned to a small pool on exit; connections beyond
+        the pool size are closed. Any uncommitted transaction is rolled back.
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE,
+            )
+            conn.row_factory = sqlite3.Row
+            self._tune_connection(conn)
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
     def initialize_report_templates(self):
         """Initialize default report templates in the database"""
         # Import DEFAULT_TEMPLATES from reports module
         try:
-            from api.reports import DEFAULT_TEMPLATES
+            from api.reports import DEFAULT_TEMPLATE_COLUMNS
         except ImportError:
-            logger.warning("Could not import DEFAULT_TEMPLATES from api.reports")
+            logger.warning("Could not import DEFAULT_TEMPLATE_COLUMNS from api.reports")
             return
 
         conn = self.get_connection()
@@ -93,33 +202,21 @@ class DataLoader:
             # Clear existing templates
             cursor.execute("DELETE FROM report_templates")
 
-            # Insert all templates from DEFAULT_TEMPLATES
-            for idx, template in enumerate(DEFAULT_TEMPLATES, start=1):
-                cursor.execute(
-                    """
-                    INSERT INTO report_templates (
-                        id, name, description, type, template_data, fields_config,
-                        chart_config, format, frequency, recipients, parameters,
-                        created_by, is_active
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'system', 1)
-                    """,
-                    (
-                        idx,
-                        template["name"],
-                        template.get("description", ""),
-                        template["type"],
-                        json.dumps(template.get("template_data", {})),
-                        json.dumps(template.get("fields_config", {})),
-                        json.dumps(template.get("chart_config", {})),
-                        template.get("format", "pdf"),
-                        template.get("frequency", "manual"),
-                        json.dumps(template.get("recipients", [])),
-                        json.dumps(template.get("parameters", {}))
-                    )
-                )
+            # Insert all templates from DEFAULT_TEMPLATES with stable ids
+            template_count = len(DEFAULT_TEMPLATE_COLUMNS[0])
+            cursor.executemany(
+                """
+                INSERT INTO report_templates (
+                    id, name, description, type, template_data, fields_config,
+                    chart_config, format, frequency, recipients, parameters,
+                    created_by, is_active
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'system', 1)
+                """,
+                zip(range(1, template_count + 1), *DEFAULT_TEMPLATE_COLUMNS),
+            )
 
             conn.commit()
-            logger.success(f"Initialized {len(DEFAULT_TEMPLATES)} report templates from DEFAULT_TEMPLATES")
+            logger.success(f"Initialized {template_count} report templates from DEFAULT_TEMPLATES")
 
         except Exception as e:
             logger.error(f"Error initializing report templates: {e}")
@@ -139,6 +236,7 @@ class DataLoader:
             # Load suppliers
             suppliers_df = pd.read_sql_query("SELECT * FROM suppliers", conn)
             self.suppliers = suppliers_df.set_index("supplier_id").to_dict("index")
+            self._supplier_list = None
 
             # Load consumption history (get latest stock levels)
             consumption_df = pd.read_sql_query(
@@ -156,6 +254,12 @@ class DataLoader:
                 ["store_id", "med_id"]
             ).to_dict("index")
 
+            # Same rows indexed by medication, so per-medication lookups do
+            # not scan every (store, medication) pair
+            self.consumption_by_med = defaultdict(list)
+            for (store_id, med_id), consumption in self.consumption_history.items():
+                self.consumption_by_med[med_id].append((store_id, consumption))
+
             # Load SKU metadata
             sku_df = pd.read_sql_query("SELECT * FROM sku_meta", conn)
             self.sku_meta = sku_df.set_index("med_id").to_dict("index")
@@ -259,15 +363,44 @@ class DataLoader:
         category: str = "",
         supplier: str = "",
         stock_level: str = "",
+        cursor: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """Get paginated and filtered inventory data"""
+        """Get paginated and filtered inventory data, optionally after a cursor"""
+        filtered_items = self.get_filtered_inventory(
+            search=search, category=category, supplier=supplier, stock_level=stock_level
+        )
+        after = self.inventory_cursor_key(cursor) if cursor is not None else None
+        return self.paginate_inventory(filtered_items, page, page_size, after)
+
+    def get_filtered_inventory(
+        self,
+        search: str = "",
+        category: str = "",
+        supplier: str = "",
+        stock_level: str = "",
+    ) -> List[Dict[str, Any]]:
+        """Get all inventory items matching the filters, sorted by name
+
+        Filters are checked against the source records as each medication is
+        visited, so items are only built for medications that match.
+        """
+        search = search.lower()
 
         # Combine all data for inventory view
         inventory_items = []
 
         for med_id, med_data in self.medications.items():
+            if category and med_data.get("category", "") != category:
+                continue
+            if search:
+                name = med_data.get("name", "")
+                if not isinstance(name, str) or search not in name.lower():
+                    continue
+
             # Get supplier info
             supplier_info = self.suppliers.get(med_data["supplier_id"], {})
+            if supplier and supplier_info.get("name", "Unknown") != supplier:
+                continue
 
             # Get SKU metadata
             sku_info = self.sku_meta.get(med_id, {})
@@ -279,13 +412,10 @@ class DataLoader:
                 stock_category = inventory_info.get("stock_status", "Unknown")
             else:
                 # Fallback: Calculate current stock across all stores
-                total_stock = 0
-                for (
-                    store_id,
-                    med_id_key,
-                ), consumption in self.consumption_history.items():
-                    if med_id_key == med_id:
-                        total_stock += consumption.get("on_hand", 0)
+                total_stock = sum(
+                    consumption.get("on_hand", 0)
+                    for _, consumption in self.consumption_by_med.get(med_id, ())
+                )
 
                 # Determine stock level category (fallback method)
                 avg_daily = sku_info.get("avg_daily_pick", 0)
@@ -298,6 +428,9 @@ class DataLoader:
                 else:
                     stock_category = "High"
 
+            if stock_level and stock_category != stock_level:
+                continue
+
             # Get storage location
             storage_info = self.slot_assignments.get(med_id, {})
             location_name = "Unassigned"
@@ -350,37 +483,72 @@ class DataLoader:
             # Clean NaN values before adding to inventory items
             inventory_items.append(clean_nan_values(item))
 
-        # Apply filters
-        filtered_items = inventory_items
+        # Sort by name
+        inventory_items.sort(key=INVENTORY_SORT_KEY)
+        return inventory_items
 
-        if search:
-            filtered_items = [
-                item
-                for item in filtered_items
-                if search.lower() in item["name"].lower()
-            ]
+    def inventory_cursor_key(self, med_id: int) -> Tuple[str, int]:
+        """Sort position of a medication, for resuming inventory after it"""
+        return self.medications.get(med_id, {}).get("name", ""), med_id
 
-        if category:
-            filtered_items = [
-                item for item in filtered_items if item["category"] == category
-            ]
+    def get_inventory_stats(self) -> Dict[str, Any]:
+        """Aggregate stock counts and value over every medication in one pass
 
-        if supplier:
-            filtered_items = [
-                item for item in filtered_items if item["supplier_name"] == supplier
-            ]
+        Reads the same stock, reorder point and price sources as
+        get_filtered_inventory without building the per-item dicts.
+        """
+        total_medications = 0
+        low_stock_count = 0
+        critical_stock_count = 0
+        total_value = 0.0
 
-        if stock_level:
-            filtered_items = [
-                item for item in filtered_items if item["stock_category"] == stock_level
-            ]
+        for med_id in self.medications:
+            inventory_info = self.current_inventory.get(med_id, {})
+            if inventory_info:
+                stock = inventory_info.get("current_stock", 0)
+            else:
+                stock = sum(
+                    consumption.get("on_hand", 0)
+                    for _, consumption in self.consumption_by_med.get(med_id, ())
+                )
+            reorder_point = inventory_info.get("reorder_point", 0)
+            price = self.drug_prices.get(med_id, {}).get("price_per_unit", 0)
+
+            # NaN compares False and is skipped, as in the inventory view
+            total_medications += 1
+            if stock <= reorder_point:
+                low_stock_count += 1
+            if stock <= reorder_point * 0.5:
+                critical_stock_count += 1
+            value = (stock or 0) * (price or 0)
+            if not pd.isna(value):
+                total_value += float(value)
 
-        # Sort by name
-        filtered_items.sort(key=lambda x: x["name"])
+        return {
+            "total_medications": total_medications,
+            "low_stock_count": low_stock_count,
+            "critical_stock_count": critical_stock_count,
+            "total_value": total_value,
+        }
+
+    @staticmethod
+    def paginate_inventory(
+        filtered_items: List[Dict[str, Any]],
+        page: int = 1,
+        page_size: int = 20,
+        after: Optional[Tuple[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """Slice filtered inventory items into a response page
 
-        # Paginate
+        With after (a sort key from inventory_cursor_key) the page starts at
+        the first item past it, found by binary search instead of an offset.
+        """
         total_items = len(filtered_items)
-        start_idx = (page - 1) * page_size
+        if after is not None:
+            start_idx = bisect_right(filtered_items, after, key=INVENTORY_SORT_KEY)
+            page = start_idx // page_size + 1
+        else:
+            start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
         paginated_items = filtered_items[start_idx:end_idx]
 
@@ -390,6 +558,9 @@ class DataLoader:
             "total_pages": (total_items + page_size - 1) // page_size,
             "page": page,
             "page_size": page_size,
+            "next_cursor": (
+                paginated_items[-1]["med_id"] if end_idx < total_items else None
+            ),
         }
 
     def get_medication_details(self, med_id: int) -> Dict[str, Any]:
@@ -404,18 +575,16 @@ class DataLoader:
         price_info = self.drug_prices.get(med_id, {})
 
         # Get consumption history for this medication
-        consumption_data = []
-        for (store_id, med_id_key), consumption in self.consumption_history.items():
-            if med_id_key == med_id:
-                consumption_data.append(
-                    {
-                        "store_id": store_id,
-                        "on_hand": consumption.get("on_hand", 0),
-                        "qty_dispensed": consumption.get("qty_dispensed", 0),
-                        "censored": consumption.get("censored", 0),
-                        "date": consumption.get("date", ""),
-                    }
-                )
+        consumption_data = [
+            {
+                "store_id": store_id,
+                "on_hand": consumption.get("on_hand", 0),
+                "qty_dispensed": consumption.get("qty_dispensed", 0),
+                "censored": consumption.get("censored", 0),
+                "date": consumption.get("date", ""),
+            }
+            for store_id, consumption in self.consumption_by_med.get(med_id, ())
+        ]
 
         # Get storage location details
         location_details = {}
@@ -484,10 +653,12 @@ class DataLoader:
     def get_medication_consumption_history(
         self, med_id: int, days: int = 365
     ) -> Dict[str, Any]:
-        """Get historical consumption data and forecast for a specific medication"""
-        try:
-            # Load full consumption history from database
-            conn = self.get_connection()
+        """Get historical consumption data and forecast for a specific medication
+
+        Raises MedicationNotFound when the medication has no consumption history.
+        """
+        # Load full consumption history from database
+        with self.pooled_connection() as conn:
             consumption_df = pd.read_sql_query(
                 """SELECT * FROM consumption_history
                    WHERE med_id = ?
@@ -495,113 +666,131 @@ class DataLoader:
                 conn,
                 params=(med_id,)
             )
-            consumption_df["date"] = pd.to_datetime(consumption_df["date"])
-            conn.close()
-
-            # Filter for specific medication (already filtered in query)
-            med_data = consumption_df.copy()
-
-            if med_data.empty:
-                return {"error": "No consumption data found for this medication"}
+        consumption_df["date"] = pd.to_datetime(consumption_df["date"])
 
-            # Sort by date and get the latest `days` records
-            med_data = med_data.sort_values("date").tail(days)
+        # Filter for specific medication (already filtered in query)
+        med_data = consumption_df.copy()
 
-            # Aggregate consumption across all stores by date
-            daily_consumption = (
-                med_data.groupby("date")
-                .agg({"qty_dispensed": "sum", "on_hand": "sum"})
-                .reset_index()
+        if med_data.empty:
+            raise MedicationNotFound(
+                f"No consumption data found for medication {med_id}"
             )
 
-            # Rename columns for consistency
-            daily_consumption = daily_consumption.rename(
-                columns={"qty_dispensed": "consumption", "on_hand": "current_stock"}
+        # Sort by date and get the latest `days` records
+        med_data = med_data.sort_values("date").tail(days)
+
+        # Aggregate consumption across all stores by date
+        daily_consumption = (
+            med_data.groupby("date")
+            .agg({"qty_dispensed": "sum", "on_hand": "sum"})
+            .reset_index()
+        )
+
+        # Rename columns for consistency
+        daily_consumption = daily_consumption.rename(
+            columns={"qty_dispensed": "consumption", "on_hand": "current_stock"}
+        )
+
+        # Generate simple forecast (moving average for next 30-60 days)
+        recent_consumption = daily_consumption.tail(30)["consumption"].mean()
+
+        # Create forecast data points
+        last_date = daily_consumption["date"].max()
+        forecast_dates = [last_date + timedelta(days=i) for i in range(1, 61)]
+
+        # Simple forecast with some variation
+        np.random.seed(42)  # For consistent results
+        base_forecast = recent_consumption
+        forecast_values = []
+
+        for i, date in enumerate(forecast_dates):
+            # Add some seasonal variation and noise
+            seasonal_factor = 1 + 0.1 * np.sin(2 * np.pi * i / 7)  # Weekly pattern
+            noise = np.random.normal(0, 0.1)
+            forecast_value = max(0, base_forecast * seasonal_factor * (1 + noise))
+            forecast_values.append(forecast_value)
+
+        # Calculate statistics
+        avg_daily_consumption = daily_consumption["consumption"].mean()
+        current_stock = (
+            daily_consumption["current_stock"].iloc[-1]
+            if len(daily_consumption) > 0
+            else 0
+        )
+        days_until_stockout = (
+            int(current_stock / avg_daily_consumption)
+            if avg_daily_consumption > 0
+            else 999
+        )
+
+        # Format data for chart
+        historical_data = []
+        for _, row in daily_consumption.iterrows():
+            historical_data.append(
+                {
+                    "date": row["date"].strftime("%Y-%m-%d"),
+                    "consumption": float(row["consumption"]),
+                    "stock": float(row["current_stock"]),
+                    "type": "historical",
+                }
             )
 
-            # Generate simple forecast (moving average for next 30-60 days)
-            recent_consumption = daily_consumption.tail(30)["consumption"].mean()
-
-            # Create forecast data points
-            last_date = daily_consumption["date"].max()
-            forecast_dates = [last_date + timedelta(days=i) for i in range(1, 61)]
-
-            # Simple forecast with some variation
-            np.random.seed(42)  # For consistent results
-            base_forecast = recent_consumption
-            forecast_values = []
-
-            for i, date in enumerate(forecast_dates):
-                # Add some seasonal variation and noise
-                seasonal_factor = 1 + 0.1 * np.sin(2 * np.pi * i / 7)  # Weekly pattern
-                noise = np.random.normal(0, 0.1)
-                forecast_value = max(0, base_forecast * seasonal_factor * (1 + noise))
-                forecast_values.append(forecast_value)
-
-            # Calculate statistics
-            avg_daily_consumption = daily_consumption["consumption"].mean()
-            current_stock = (
-                daily_consumption["current_stock"].iloc[-1]
-                if len(daily_consumption) > 0
-                else 0
-            )
-            days_until_stockout = (
-                int(current_stock / avg_daily_consumption)
-                if avg_daily_consumption > 0
-                else 999
+        forecast_data = []
+        for i, date in enumerate(forecast_dates):
+            forecast_data.append(
+                {
+                    "date": date.strftime("%Y-%m-%d"),
+                    "consumption": float(forecast_values[i]),
+                    "stock": max(0, current_stock - sum(forecast_values[: i + 1])),
+                    "type": "forecast",
+                }
             )
 
-            # Format data for chart
-            historical_data = []
-            for _, row in daily_consumption.iterrows():
-                historical_data.append(
-                    {
-                        "date": row["date"].strftime("%Y-%m-%d"),
-                        "consumption": float(row["consumption"]),
-                        "stock": float(row["current_stock"]),
-                        "type": "historical",
-                    }
-                )
-
-            forecast_data = []
-            for i, date in enumerate(forecast_dates):
-                forecast_data.append(
-                    {
-                        "date": date.strftime("%Y-%m-%d"),
-                        "consumption": float(forecast_values[i]),
-                        "stock": max(0, current_stock - sum(forecast_values[: i + 1])),
-                        "type": "forecast",
-                    }
-                )
+        result = {
+            "med_id": med_id,
+            "historical_data": historical_data,
+            "forecast_data": forecast_data,
+            "statistics": {
+                "avg_daily_consumption": float(avg_daily_consumption),
+                "current_stock": float(current_stock),
+                "days_until_stockout": days_until_stockout,
+                "forecast_period_days": 60,
+                "data_period_days": len(daily_consumption),
+            },
+        }
 
-            result = {
-                "med_id": med_id,
-                "historical_data": historical_data,
-                "forecast_data": forecast_data,
-                "statistics": {
-                    "avg_daily_consumption": float(avg_daily_consumption),
-                    "current_stock": float(current_stock),
-                    "days_until_stockout": days_until_stockout,
-                    "forecast_period_days": 60,
-                    "data_period_days": len(daily_consumption),
-                },
-            }
+        return clean_nan_values(result)
 
-            return clean_nan_values(result)
+    def get_suppliers(self) -> List[Dict[str, Any]]:
+        """Get all suppliers with their details, contacts included
 
-        except Exception as e:
-            return {"error": f"Failed to load consumption history: {str(e)}"}
+        The suppliers table carries the contact columns, so the loaded rows
+        need no further joins; the cleaned, sorted list is built once per load.
+        """
+        if self._supplier_list is None:
+            self._supplier_list = clean_nan_values(
+                [
+                    {"supplier_id": supplier_id, **supplier_data}
+                    for supplier_id, supplier_data in sorted(self.suppliers.items())
+                ]
+            )
+        return list(self._supplier_list)
 
-    def get_suppliers(self) -> List[Dict[str, Any]]:
-        """Get all suppliers with their details"""
-        suppliers_list = []
-        for supplier_id, supplier_data in self.suppliers.items():
-            supplier_dict = {"supplier_id": supplier_id, **supplier_data}
-            suppliers_list.append(supplier_dict)
+    def get_medications_bulk(self, med_ids) -> Dict[int, Dict[str, Any]]:
+        """Get the loaded medication records for several IDs in one call"""
+        return {
+            med_id: self.medications[med_id]
+            for med_id in med_ids
+            if med_id in self.medications
+        }
 
-        # Sort by supplier_id for consistent ordering
-        suppliers_list.sort(key=lambda x: x["supplier_id"])
-        return clean_nan_values(suppliers_list)
+    def get_suppliers_bulk(self, supplier_ids) -> Dict[int, Dict[str, Any]]:
+        """Get the loaded supplier records for several IDs in one call"""
+        return {
+            supplier_id: self.suppliers[supplier_id]
+            for supplier_id in supplier_ids
+            if supplier_id in self.suppliers
+        }
 
     def get_medication_supplier_prices(self, med_id: int) -> Dict[str, Any]:
         """Get all supplier prices for a medication with supplier details"""
@@ -613,7 +802,6 @@ class DataLoader:
             return {"prices": []}
 
         # Get supplier-specific prices from database
-        conn = self.get_connection()
         query = """
             SELECT msp.*, s.name as supplier_name, s.avg_lead_time, s.status as supplier_status
             FROM med_supplier_prices msp
@@ -622,7 +810,8 @@ class DataLoader:
             ORDER BY msp.supplier_id
         """
 
-        df = pd.read_sql_query(query, conn, params=(med_id,))
+        with self.pooled_connection() as conn:
+            df = pd.read_sql_query(query, conn, params=(med_id,))
 
         if not df.empty:
             for _, row in df.iterrows():
@@ -654,17 +843,60 @@ class DataLoader:
 
         return clean_nan_values({"prices": prices})
 
+    def next_po_number(self, year: int, count: int = 1) -> int:
+        """Atomically reserve count consecutive PO sequence numbers for a year
+
+        Returns the first number of the block; the caller uses first + i.
+        """
+        with self.pooled_connection() as conn:
+            if not DataLoader._po_counters_ready:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS po_number_counters (
+                        year INTEGER PRIMARY KEY,
+                        last_number INTEGER NOT NULL
+                    )
+                """
+                )
+                DataLoader._po_counters_ready = True
+
+            # A year's counter starts after the highest PO-{year}-NNNNN already
+            # stored, so gaps or deleted POs never lead to a reused number.
+            # GLOB (unlike LIKE) is a range scan on the po_number unique index
+            row = conn.execute(
+                """
+                INSERT INTO po_number_counters (year, last_number)
+                VALUES (?, (
+                    SELECT COALESCE(MAX(CAST(substr(po_number, 9, 5) AS INTEGER)), 0) + ?
+                    FROM purchase_orders
+                    WHERE po_number GLOB ?
+                ))
+                ON CONFLICT(year) DO UPDATE SET last_number = last_number + ?
+                RETURNING last_number
+            """,
+                (year, count, f"PO-{year}-*", count),
+            ).fetchone()
+            conn.commit()
+
+        return row[0] - count + 1
+
     def save_purchase_order(self, po_data: Dict[str, Any]) -> str:
         """Save a purchase order to the database"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        self.save_purchase_orders([po_data])
+        return po_data["po_id"]
 
-        try:
-            # Begin transaction
+    def save_purchase_orders(self, po_records: List[Dict[str, Any]]) -> List[str]:
+        """Save several purchase orders and their items in one transaction
+
+        Uses a pooled connection; if any insert fails nothing is committed and
+        the pool rolls the transaction back when the connection is returned.
+        """
+        with self.pooled_connection() as conn:
+            cursor = conn.cursor()
             conn.execute("BEGIN TRANSACTION")
 
-            # Insert main PO record
-            cursor.execute(
+            # Insert main PO records
+            cursor.executemany(
                 """
                 INSERT INTO purchase_orders (
                     po_id, po_number, supplier_id, supplier_name, status,
@@ -672,30 +904,33 @@ class DataLoader:
                     notes, created_by
                 ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-                (
-                    po_data["po_id"],
-                    po_data["po_number"],
-                    po_data["supplier_id"],
-                    po_data["supplier_name"],
-                    po_data["status"],
-                    po_data["total_amount"],
-                    po_data["created_at"],
-                    po_data["updated_at"],
-                    po_data.get("requested_delivery_date"),
-                    po_data.get("notes"),
-                    po_data.get("created_by", "system"),
-                ),
+                [
+                    (
+                        po_data["po_id"],
+                        po_data["po_number"],
+                        po_data["supplier_id"],
+                        po_data["supplier_name"],
+                        po_data["status"],
+                        po_data["total_amount"],
+                        po_data["created_at"],
+                        po_data["updated_at"],
+                        po_data.get("requested_delivery_date"),
+                        po_data.get("notes"),
+                        po_data.get("created_by", "system"),
+                    )
+                    for po_data in po_records
+                ],
             )
 
             # Insert PO items
-            for item in po_data["items"]:
-                cursor.execute(
-                    """
-                    INSERT INTO purchase_order_items (
-                        po_id, med_id, med_name, quantity, 
-                        unit_price, total_price, pack_size
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
+            cursor.executemany(
+                """
+                INSERT INTO purchase_order_items (
+                    po_id, med_id, med_name, quantity, 
+                    unit_price, total_price, pack_size
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
                     (
                         po_data["po_id"],
                         item["med_id"],
@@ -704,27 +939,37 @@ class DataLoader:
                         item["unit_price"],
                         item["total_price"],
                         item.get("pack_size", 0),
-                    ),
-                )
+                    )
+                    for po_data in po_records
+                    for item in po_data["items"]
+                ],
+            )
 
             conn.commit()
 
-            # Add to in-memory cache
-            self.purchase_orders[po_data["po_id"]] = po_data
-
-            return po_data["po_id"]
+        # Extend the per-medication PO history loaded at startup, in the same
+        # row shape as the purchase_order_items join it was built from
+        for po_data in po_records:
+            for item in po_data["items"]:
+                self.purchase_orders.setdefault(item["med_id"], []).append(
+                    {
+                        "po_id": po_data["po_id"],
+                        "med_name": item["med_name"],
+                        "quantity": item["quantity"],
+                        "unit_price": item["unit_price"],
+                        "total_price": item["total_price"],
+                        "pack_size": item.get("pack_size", 0),
+                        "po_number": po_data["po_number"],
+                        "status": po_data["status"],
+                        "created_at": po_data["created_at"],
+                    }
+                )
 
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+        return [po_data["po_id"] for po_data in po_records]
 
     def get_purchase_order(self, po_id: str) -> Optional[Dict[str, Any]]:
         """Get a purchase order by ID"""
-        conn = self.get_connection()
-
-        try:
+        with self.pooled_connection() as conn:
             # Query PO with supplier contact information
             po_query = """
                 SELECT po.*, 
@@ -752,61 +997,52 @@ class DataLoader:
             po["items"] = items_df.to_dict("records") if not items_df.empty else []
 
             return clean_nan_values(po)
-        finally:
-            conn.close()
 
     def list_purchase_orders(
         self, status: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """List all purchase orders, optionally filtered by status"""
-        conn = self.get_connection()
+        if status:
+            query = PO_SUMMARY_QUERY.format(where="WHERE po.status = ?")
+            params = (status,)
+        else:
+            query = PO_SUMMARY_QUERY.format(where="")
+            params = ()
 
-        try:
-            # Build query
-            if status:
-                query = """
-                    SELECT po.*, 
-                           COUNT(CASE WHEN poi.item_id IS NOT NULL THEN 1 END) as item_count,
-                           SUM(poi.quantity) as total_quantity,
-                           s.avg_lead_time,
-                           datetime(po.created_at, '+' || COALESCE(s.avg_lead_time, 7) || ' days') as expected_delivery_date
-                    FROM purchase_orders po
-                    LEFT JOIN purchase_order_items poi ON po.po_id = poi.po_id
-                    LEFT JOIN suppliers s ON po.supplier_id = s.supplier_id
-                    WHERE po.status = ?
-                    GROUP BY po.po_id
-                    ORDER BY po.created_at DESC
-                """
-                params = (status,)
-            else:
-                query = """
-                    SELECT po.*, 
-                           COUNT(CASE WHEN poi.item_id IS NOT NULL THEN 1 END) as item_count,
-                           SUM(poi.quantity) as total_quantity,
-                           s.avg_lead_time,
-                           datetime(po.created_at, '+' || COALESCE(s.avg_lead_time, 7) || ' days') as expected_delivery_date
-                    FROM purchase_orders po
-                    LEFT JOIN purchase_order_items poi ON po.po_id = poi.po_id
-                    LEFT JOIN suppliers s ON po.supplier_id = s.supplier_id
-                    GROUP BY po.po_id
-                    ORDER BY po.created_at DESC
-                """
-                params = ()
+        # Rows straight from the cursor; NULLs are already None
+        with self.pooled_connection() as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
 
-            df = pd.read_sql_query(query, conn, params=params)
+    def purchase_orders_version(self) -> str:
+        """Cheap fingerprint of the PO tables that changes whenever the list would"""
+        with self.pooled_connection() as conn:
+            row = conn.execute(
+                """
+                SELECT (SELECT COUNT(*) FROM purchase_orders),
+                       (SELECT MAX(updated_at) FROM purchase_orders),
+                       (SELECT MAX(created_at) FROM purchase_orders),
+                       (SELECT COUNT(*) FROM purchase_order_items)
+            """
+            ).fetchone()
+        return "|".join(str(value) for value in row)
 
-            if df.empty:
-                return []
+    def iter_purchase_order_summaries(self, batch_size: int = 500):
+        """Yield PO list rows in cursor batches, as comma-joined JSON objects
 
-            pos = df.to_dict("records")
-            return clean_nan_values(pos)
-        finally:
-            conn.close()
+        SQLite encodes each row with json_object, so rows go straight from
+        the cursor to the response without building Python dicts.
+        """
+        with self.pooled_connection() as conn:
+            cursor = conn.execute(PO_LIST_QUERY)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield ",".join([row[0] for row in rows]).encode()
 
     def get_warehouse_zones(self) -> List[Dict[str, Any]]:
         """Get all warehouse zones with their details"""
-        conn = self.get_connection()
-        try:
+        with self.pooled_connection() as conn:
             query = """
                 SELECT z.*, COUNT(DISTINCT a.aisle_id) as aisle_count
                 FROM warehouse_zones z
@@ -815,15 +1051,12 @@ class DataLoader:
             """
             df = pd.read_sql_query(query, conn)
             return clean_nan_values(df.to_dict("records"))
-        finally:
-            conn.close()
 
     def get_warehouse_aisles(
         self, zone_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get warehouse aisles, optionally filtered by zone"""
-        conn = self.get_connection()
-        try:
+        with self.pooled_connection() as conn:
             if zone_id:
                 query = """
                     SELECT a.*, COUNT(s.shelf_id) as shelf_count,
@@ -844,15 +1077,12 @@ class DataLoader:
                 """
                 df = pd.read_sql_query(query, conn)
             return clean_nan_values(df.to_dict("records"))
-        finally:
-            conn.close()
 
     def get_warehouse_shelves(
         self, aisle_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get warehouse shelves, optionally filtered by aisle"""
-        conn = self.get_connection()
-        try:
+        with self.pooled_connection() as conn:
             if aisle_id:
                 query = """
                     SELECT s.*,
@@ -881,13 +1111,10 @@ class DataLoader:
                 """
                 df = pd.read_sql_query(query, conn)
             return clean_nan_values(df.to_dict("records"))
-        finally:
-            conn.close()
 
     def get_shelf_positions(self, shelf_id: int) -> pd.DataFrame:
         """Get all positions for a specific shelf with medication details"""
-        conn = self.get_connection()
-        try:
+        with self.pooled_connection() as conn:
             query = """
                 SELECT p.*,
                        mp.med_id, mp.batch_id, mp.quantity, mp.expiry_date,
@@ -904,15 +1131,12 @@ class DataLoader:
                 ORDER BY p.grid_y, p.grid_x
             """
             return pd.read_sql_query(query, conn, params=[shelf_id])
-        finally:
-            conn.close()
 
     def get_medication_placements(
         self, med_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get medication placements across the warehouse"""
-        conn = self.get_connection()
-        try:
+        with self.pooled_connection() as conn:
             if med_id:
                 query = """
                     SELECT mp.*, sp.shelf_id, sp.grid_x, sp.grid_y,
@@ -940,15 +1164,12 @@ class DataLoader:
                 """
                 df = pd.read_sql_query(query, conn)
             return clean_nan_values(df.to_dict("records"))
-        finally:
-            conn.close()
 
     def get_warehouse_alerts(
         self, days_ahead: int = 30
     ) -> Dict[str, List[Dict[str, Any]]]:
         """Get warehouse alerts for expiring items, temperature issues, and capacity warnings"""
-        conn = self.get_connection()
-        try:
+        with self.pooled_connection() as conn:
             alerts = {"expiry": [], "temperature": [], "capacity": []}
 
             # Expiry alerts
@@ -992,15 +1213,12 @@ class DataLoader:
             alerts["capacity"] = clean_nan_values(capacity_df.to_dict("records"))
 
             return alerts
-        finally:
-            conn.close()
 
     def get_movement_history(
         self, days: int = 7, med_id: Optional[int] = None
     ) -> pd.DataFrame:
         """Get movement history for the warehouse"""
-        conn = self.get_connection()
-        try:
+        with self.pooled_connection() as conn:
             if med_id:
                 query = f"""
                     SELECT mh.*, m.name as med_name,
@@ -1028,8 +1246,6 @@ class DataLoader:
                     ORDER BY mh.movement_date DESC
                 """
                 return pd.read_sql_query(query, conn)
-        finally:
-            conn.close()
 
     def __del__(self):
         """Close database connection when object is destroyed"""
@@ -79,6 +79,14 @@ def create_tables(conn):
         )
     """)
 
+    # Per-year purchase order number counter
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS po_number_counters (
+            year INTEGER PRIMARY KEY,
+            last_number INTEGER NOT NULL
+        )
+    """)
+
     # Create AI metadata tables
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS ai_po_sessions (
@@ -121,6 +129,10 @@ def create_tables(conn):
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_purchase_orders_supplier_id ON purchase_orders(supplier_id)"
     )
+    # MAX(updated_at) in the PO list ETag version check
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_purchase_orders_updated_at ON purchase_orders(updated_at)"
+    )
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_purchase_order_items_po_id ON purchase_order_items(po_id)"
     )
@@ -141,6 +153,37 @@ def create_tables(conn):
     print("Tables created successfully")
 
 
+# Indexes backing the report queries in api/reports.py
+REPORT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_purchase_orders_supplier_created ON purchase_orders(supplier_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_purchase_orders_created ON purchase_orders(created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_purchase_orders_updated_at ON purchase_orders(updated_at)",
+    "CREATE INDEX IF NOT EXISTS idx_medication_placements_active_batch ON medication_placements(batch_id, position_id, med_id, quantity) WHERE is_active = 1",
+    "CREATE INDEX IF NOT EXISTS idx_medication_placements_active_position ON medication_placements(position_id, med_id) WHERE is_active = 1",
+    "CREATE INDEX IF NOT EXISTS idx_movement_history_date_position ON movement_history(movement_date, position_id, movement_type)",
+    "CREATE INDEX IF NOT EXISTS idx_batch_info_expiry ON batch_info(expiry_date)",
+    "CREATE INDEX IF NOT EXISTS idx_consumption_med_date ON consumption_history(med_id, date)",
+    "CREATE INDEX IF NOT EXISTS idx_report_history_template_executed ON report_history(template_id, executed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_report_history_executed ON report_history(executed_at, id)",
+)
+
+
+def create_report_indexes(conn):
+    """Create indexes used by report queries and refresh planner statistics"""
+    cursor = conn.cursor()
+
+    for statement in REPORT_INDEXES:
+        try:
+            cursor.execute(statement)
+        except sqlite3.OperationalError as e:
+            # Table missing in older databases
+            print(f"Skipping index: {e}")
+
+    cursor.execute("ANALYZE")
+    conn.commit()
+    print("Report indexes created successfully")
+
+
 def import_supplier_prices(conn):
     """Import med_supplier_prices.csv into the database"""
     cursor = conn.cursor()
@@ -239,6 +282,9 @@ def main():
         # Create new tables
         create_tables(conn)
 
+        # Create report query indexes
+        create_report_indexes(conn)
+
         # Import supplier prices
         import_supplier_prices(conn)
 
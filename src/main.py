@@ -7,20 +7,23 @@ import subprocess
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from loguru import logger
 
 from api.analytics import router as analytics_router
 from api.chat import router as chat_router
 from api.reports import router as reports_router
-from api.routes import data_loader
+from api.reports import shutdown_failure_writer, shutdown_pdf_pool
+from api.routes import data_loader, init_ai_po_handler, shutdown_smtp_pool
 from api.routes import router as api_router
 from api.warehouse_routes import router as warehouse_router
 from api.warehouse_routes_optimized import router as warehouse_optimized_router
 from api.warehouse_optimization_routes import router as warehouse_optimization_router
 from api.websocket_routes import router as websocket_router
+from data_loader import MedicationNotFound
 
 
 def build_frontend():
@@ -64,6 +67,9 @@ async def lifespan(app: FastAPI):
 
         # Initialize report templates
         data_loader.initialize_report_templates()
+
+        # Build the AI PO workflow now that data is loaded
+        app.state.ai_po_handler = init_ai_po_handler()
     except Exception as e:
         logger.error(f"Failed to load data: {e}")
         raise
@@ -71,6 +77,9 @@ async def lifespan(app: FastAPI):
     yield
 
     # Shutdown (if needed)
+    await shutdown_failure_writer()
+    shutdown_pdf_pool()
+    shutdown_smtp_pool()
     logger.info("Application shutdown")
 
 
@@ -84,8 +93,27 @@ app = FastAPI(
     description="Warehouse inventory management system",
     version="1.0.0",
     lifespan=lifespan,
+    # Routes that do not pick their own response class serialize with orjson
+    default_response_class=ORJSONResponse,
 )
 
+
+@app.exception_handler(MedicationNotFound)
+async def medication_not_found_handler(request: Request, exc: MedicationNotFound):
+    """Map missing medication data to a 404 response"""
+    return ORJSONResponse(status_code=404, content={"detail": str(exc)})
+
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Log unexpected errors and return them as a 500 with the error message"""
+    logger.exception(f"Unhandled error on {request.method} {request.url.path}: {exc}")
+    return ORJSONResponse(status_code=500, content={"detail": str(exc)})
+
+
+# Compress large JSON payloads (inventory pages, histories, AI results)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Mount API routes
 app.include_router(api_router, prefix="/api")
 app.include_router(analytics_router, prefix="/api")
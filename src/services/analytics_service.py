@@ -5,16 +5,12 @@ Business logic for complex analytics calculations, caching, and data processing
 
 import hashlib
 import json
-import os
 import sqlite3
-import sys
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, Optional
 
 from loguru import logger
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data_loader import DataLoader
 
 
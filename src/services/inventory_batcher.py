@@ -0,0 +1,65 @@
+"""
+Inventory Batcher
+Coalesces concurrent inventory requests that share the same filters
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+InventoryFilters = Tuple[str, str, str, str]
+
+
+class InventoryBatcher:
+    """Shares one filtered inventory build between concurrent requests
+
+    Requests with the same (search, category, supplier, stock_level) filters
+    that arrive while a build is in flight await that build instead of
+    starting their own, then slice out their own page.
+    """
+
+    def __init__(self, data_loader):
+        """Initialize with the data loader that builds inventory items"""
+        self.data_loader = data_loader
+        self._in_flight: Dict[InventoryFilters, asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def get_page(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        search: str = "",
+        category: str = "",
+        supplier: str = "",
+        stock_level: str = "",
+        cursor: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Get one page of filtered inventory, joining an identical build if running"""
+        items = await self._filtered_items((search, category, supplier, stock_level))
+        after = (
+            self.data_loader.inventory_cursor_key(cursor)
+            if cursor is not None
+            else None
+        )
+        return self.data_loader.paginate_inventory(items, page, page_size, after)
+
+    async def _filtered_items(self, key: InventoryFilters) -> List[Dict[str, Any]]:
+        """Return the filtered items for key, building them at most once at a time"""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(
+            asyncio.to_thread(self.data_loader.get_filtered_inventory, *key)
+        )
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        logger.debug(f"Building inventory for filters {key}")
+        return await asyncio.shield(future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics"""
+        return {"in_flight": len(self._in_flight), "coalesced": self.coalesced}
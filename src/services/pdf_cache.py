@@ -0,0 +1,128 @@
+"""
+PDF Cache Service
+Content-addressed on-disk cache for rendered report PDFs
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "tmp" / "pdf_cache"
+
+
+class PDFCache:
+    """Stores rendered PDFs on disk keyed by a hash of their inputs"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: Optional[int] = None):
+        """Initialize the cache directory and size cap"""
+        self.cache_dir = Path(cache_dir or os.getenv("PDF_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_bytes = int(max_size_mb or os.getenv("PDF_CACHE_MAX_MB", 100)) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(
+        self,
+        template: Dict[str, Any],
+        parameters: Dict[str, Any],
+        data: List[Dict[str, Any]],
+    ) -> str:
+        """Hash the rendering inputs into a stable cache key
+
+        The key includes the current hour, like the report data cache, because
+        a PDF embeds its render time and AI insights and must not outlive them.
+        """
+        payload = json.dumps(
+            {
+                "template": template,
+                "parameters": parameters,
+                "data": data,
+                "hour": time.strftime("%Y%m%d%H"),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def make_batch_key(self, keys: List[str]) -> str:
+        """Combine per-report keys into a key for a combined PDF"""
+        payload = ",".join(keys)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=20).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached PDF bytes, or None on a miss"""
+        path = self.cache_dir / f"{key}.pdf"
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Refresh mtime so eviction keeps recently used entries
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return content
+
+    def put(self, key: str, content: bytes) -> None:
+        """Atomically write a rendered PDF and evict old entries if over size"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}.pdf"
+            tmp_path = self.cache_dir / f"{key}.pdf.{os.getpid()}.tmp"
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+            self._evict()
+        except OSError as e:
+            logger.warning(f"Could not write PDF cache entry {key}: {str(e)}")
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits its cap"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        """Remove all cached PDFs"""
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        files = list(self.cache_dir.glob("*.pdf")) if self.cache_dir.exists() else []
+        return {
+            "entries": len(files),
+            "size_bytes": sum(f.stat().st_size for f in files),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
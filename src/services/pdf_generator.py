@@ -197,14 +197,58 @@ class PDFReportGenerator:
         Returns:
             PDF content as bytes
         """
-        # Sanitize AI insights if provided
-        if ai_insights:
-            ai_insights = self._sanitize_ai_insights(ai_insights)
-
         buffer = io.BytesIO()
 
         # Create document
-        doc = SimpleDocTemplate(
+        doc = self._create_document(buffer)
+
+        # Build story (content)
+        story = self._build_report_story(template, data, ai_insights)
+
+        # Build PDF
+        doc.build(story, canvasmaker=NumberedCanvas)
+
+        # Get PDF content
+        pdf = buffer.getvalue()
+        buffer.close()
+
+        logger.info(f"Generated PDF report: {template.get('name', 'Report')}")
+        return pdf
+
+    def generate_combined_report_pdf(self, reports: List[Dict[str, Any]]) -> bytes:
+        """
+        Generate a single PDF containing several reports in one render pass
+
+        Args:
+            reports: List of dicts with "template", "data" and optional "ai_insights"
+
+        Returns:
+            PDF content as bytes
+        """
+        buffer = io.BytesIO()
+        doc = self._create_document(buffer)
+
+        story = []
+        for index, report in enumerate(reports):
+            if index:
+                story.append(PageBreak())
+            story.extend(
+                self._build_report_story(
+                    report["template"], report["data"], report.get("ai_insights")
+                )
+            )
+
+        doc.build(story, canvasmaker=NumberedCanvas)
+
+        pdf = buffer.getvalue()
+        buffer.close()
+
+        logger.info(f"Generated combined PDF with {len(reports)} reports")
+        return pdf
+
+    def _create_document(self, buffer: io.BytesIO) -> SimpleDocTemplate:
+        """Create the document used for report PDFs"""
+        return SimpleDocTemplate(
             buffer,
             pagesize=letter,
             rightMargin=72,
@@ -213,7 +257,17 @@ class PDFReportGenerator:
             bottomMargin=72,
         )
 
-        # Build story (content)
+    def _build_report_story(
+        self,
+        template: Dict[str, Any],
+        data: List[Dict[str, Any]],
+        ai_insights: Optional[Dict[str, Any]] = None,
+    ) -> List:
+        """Build the flowables for a single report"""
+        # Sanitize AI insights if provided
+        if ai_insights:
+            ai_insights = self._sanitize_ai_insights(ai_insights)
+
         story = []
 
         # Add cover page
@@ -233,15 +287,7 @@ class PDFReportGenerator:
             story.append(PageBreak())
             story.extend(self._create_ai_insights_section(ai_insights))
 
-        # Build PDF
-        doc.build(story, canvasmaker=NumberedCanvas)
-
-        # Get PDF content
-        pdf = buffer.getvalue()
-        buffer.close()
-
-        logger.info(f"Generated PDF report: {template.get('name', 'Report')}")
-        return pdf
+        return story
 
     def _create_cover_page(self, template: Dict[str, Any]) -> List:
         """Create cover page elements"""
@@ -600,8 +646,8 @@ class PDFReportGenerator:
         if not data:
             return []
 
-        # Get headers from first row
-        headers = list(data[0].keys())
+        # Get headers from all rows, in first-seen order, as row shapes can differ
+        headers = list(dict.fromkeys(key for row in data for key in row))
 
         # Create style for wrapping text with proper word wrapping
         wrap_style = ParagraphStyle(
@@ -807,3 +853,29 @@ class PDFReportGenerator:
         # This is simplified - you can expand based on your needs
 
         return self.generate_report_pdf(template, flattened_data, ai_insights)
+
+
+# Per-process generator used by the module-level render functions below
+_worker_generator: Optional[PDFReportGenerator] = None
+
+
+def _get_worker_generator() -> PDFReportGenerator:
+    """Create the generator once per process so styles are built once"""
+    global _worker_generator
+    if _worker_generator is None:
+        _worker_generator = PDFReportGenerator()
+    return _worker_generator
+
+
+def render_report_pdf(
+    template: Dict[str, Any],
+    data: List[Dict[str, Any]],
+    ai_insights: Optional[Dict[str, Any]] = None,
+) -> bytes:
+    """Render a report PDF; picklable entry point for process pool workers"""
+    return _get_worker_generator().generate_report_pdf(template, data, ai_insights)
+
+
+def render_combined_report_pdf(reports: List[Dict[str, Any]]) -> bytes:
+    """Render a combined PDF; picklable entry point for process pool workers"""
+    return _get_worker_generator().generate_combined_report_pdf(reports)
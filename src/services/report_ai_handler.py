@@ -7,12 +7,9 @@ from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 import json
 import os
-import sys
 from loguru import logger
 from langchain_openai import ChatOpenAI
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import workflow
 from ai_agents.report_insights_workflow import (
@@ -7,14 +7,11 @@ import csv
 import json
 import os
 import sqlite3
-import sys
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from loguru import logger
 
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data_loader import DataLoader
 
 
@@ -0,0 +1,73 @@
+"""
+Request Coalescer
+Caches blocking lookups briefly and shares in-flight ones between requests
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from loguru import logger
+
+from utils.cache_manager import CacheManager
+
+
+class RequestCoalescer:
+    """Single-flight wrapper around a TTL cache for read-mostly lookups
+
+    A cached result is returned directly. Otherwise requests for the same
+    key that arrive while a lookup is running await that lookup instead of
+    issuing their own, and the result is cached once it completes.
+    """
+
+    def __init__(self, ttl_seconds: int = 30):
+        """Initialize the result cache and in-flight table"""
+        self.cache = CacheManager(default_ttl_seconds=ttl_seconds)
+        self._in_flight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self.coalesced = 0
+
+    async def get(
+        self, prefix: str, key: Hashable, fetch: Callable[..., Any], *args: Any
+    ) -> Any:
+        """Return fetch(*args) for (prefix, key), running it at most once at a time"""
+        cache_key = self.cache._generate_key(prefix, key)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        flight_key = (prefix, key)
+        future = self._in_flight.get(flight_key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(asyncio.to_thread(fetch, *args))
+        self._in_flight[flight_key] = future
+
+        def _finish(done: asyncio.Future) -> None:
+            # An invalidate() while running leaves this result stale; skip it
+            if self._in_flight.get(flight_key) is not done:
+                return
+            del self._in_flight[flight_key]
+            if not done.cancelled() and done.exception() is None:
+                result = done.result()
+                # Misses are not cached so a new record is picked up at once
+                if result:
+                    self.cache.set(cache_key, result)
+
+        future.add_done_callback(_finish)
+
+        logger.debug(f"Fetching {prefix} for {key}")
+        return await asyncio.shield(future)
+
+    def invalidate(self, prefix: str, key: Hashable) -> None:
+        """Forget the cached result for (prefix, key) after its data changed"""
+        self.cache.invalidate(self.cache._generate_key(prefix, key))
+        self._in_flight.pop((prefix, key), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing and cache statistics"""
+        return {
+            "in_flight": len(self._in_flight),
+            "coalesced": self.coalesced,
+            "cache": self.cache.get_stats(),
+        }
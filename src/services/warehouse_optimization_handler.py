@@ -14,10 +14,6 @@ import hashlib
 from fastapi import BackgroundTasks
 
 # Import warehouse optimization workflow
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from ai_agents.warehouse_optimization_workflow import WarehouseOptimizationWorkflow
 
 
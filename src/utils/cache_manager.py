@@ -16,9 +16,12 @@ logger = logging.getLogger(__name__)
 class CacheManager:
     """Simple in-memory cache with TTL support"""
 
-    def __init__(self, default_ttl_seconds: int = 60):
+    def __init__(
+        self, default_ttl_seconds: int = 60, max_entries: Optional[int] = None
+    ):
         self.cache: Dict[str, Dict[str, Any]] = {}
         self.default_ttl = default_ttl_seconds
+        self.max_entries = max_entries
 
     def _generate_key(self, prefix: str, params: Any) -> str:
         """Generate cache key from prefix and parameters"""
@@ -42,6 +45,10 @@ class CacheManager:
     def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
         """Set value in cache with TTL"""
         ttl = ttl_seconds if ttl_seconds is not None else self.default_ttl
+        # Re-insert so dict order tracks the most recent write
+        self.cache.pop(key, None)
+        if self.max_entries is not None and len(self.cache) >= self.max_entries:
+            self._evict()
         self.cache[key] = {
             "value": value,
             "expires_at": datetime.now() + timedelta(seconds=ttl),
@@ -49,6 +56,16 @@ class CacheManager:
         }
         logger.debug(f"Cache set for key: {key}, TTL: {ttl}s")
 
+    def _evict(self) -> None:
+        """Drop expired entries, then the oldest ones, to make room for one more"""
+        now = datetime.now()
+        expired = [k for k, entry in self.cache.items() if now >= entry["expires_at"]]
+        for key in expired:
+            del self.cache[key]
+
+        while len(self.cache) >= self.max_entries:
+            del self.cache[next(iter(self.cache))]
+
     def invalidate(self, pattern: Optional[str] = None) -> int:
         """Invalidate cache entries matching pattern or all if no pattern"""
         if pattern is None:
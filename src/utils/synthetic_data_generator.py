@@ -219,6 +219,12 @@ def create_tables(conn):
         FOREIGN KEY (med_id) REFERENCES medications(med_id)
     );
 
+    -- Per-year purchase order number counter
+    CREATE TABLE IF NOT EXISTS po_number_counters (
+        year INTEGER PRIMARY KEY,
+        last_number INTEGER NOT NULL
+    );
+
     -- AI metadata tables
     CREATE TABLE IF NOT EXISTS ai_po_sessions (
         session_id TEXT PRIMARY KEY,
@@ -672,6 +678,32 @@ def create_tables(conn):
         "CREATE INDEX IF NOT EXISTS idx_current_inventory_med ON current_inventory(med_id)"
     )
 
+    # Report query indexes
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_purchase_orders_supplier_created ON purchase_orders(supplier_id, created_at)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_purchase_orders_created ON purchase_orders(created_at)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_purchase_orders_updated_at ON purchase_orders(updated_at)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_medication_placements_active_batch ON medication_placements(batch_id, position_id, med_id, quantity) WHERE is_active = 1"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_medication_placements_active_position ON medication_placements(position_id, med_id) WHERE is_active = 1"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_movement_history_date_position ON movement_history(movement_date, position_id, movement_type)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_report_history_template_executed ON report_history(template_id, executed_at)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_report_history_executed ON report_history(executed_at, id)"
+    )
+
     # Ensure new supplier contact columns exist on older DBs
     cur.execute("PRAGMA table_info(suppliers)")
     cols = {row[1] for row in cur.fetchall()}
@@ -3694,7 +3726,9 @@ def generate_all(
     # Insert purchase orders into database
     print("Writing purchase orders to DB …")
     if purchase_orders:
-        from uuid import uuid4
+        import secrets
+
+        po_date = datetime.now(timezone.utc).strftime("%Y%m%d")
 
         # Transform and insert into purchase_orders and purchase_order_items tables
         po_db_rows = []
@@ -3702,7 +3736,7 @@ def generate_all(
 
         for po in purchase_orders:
             # Generate proper TEXT po_id
-            po_id_text = f"PO-{datetime.now(timezone.utc).strftime('%Y%m%d')}-{str(uuid4())[:8].upper()}"
+            po_id_text = f"PO-{po_date}-{secrets.token_hex(4).upper()}"
 
             # Get supplier name
             supplier_name = next(